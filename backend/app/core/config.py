@@ -4,5 +4,35 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY não definida no arquivo .env")
\ No newline at end of file
+
+# --- Backend de LLM ---
+# 'gemini' (padrão, exige GOOGLE_API_KEY) ou 'replay' (conversas gravadas, sem rede)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-pro")
+REPLAY_FILE = os.getenv("REPLAY_FILE", "data/replay_conversations.json")
+REPLAY_LATENCY_S = float(os.getenv("REPLAY_LATENCY_S", "0.5"))
+REPLAY_JITTER_S = float(os.getenv("REPLAY_JITTER_S", "0.2"))
+# Threads dedicadas às chamadas (bloqueantes) ao modelo = chamadas simultâneas ao LLM
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+# --- Fila de jobs assíncronos (ferramentas pesadas) ---
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "data/jobs.sqlite3")
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+# Tempo (s) que o /chat espera por um job antes de devolver o job_id ao assistente
+JOBS_CHAT_WAIT_S = float(os.getenv("JOBS_CHAT_WAIT_S", "3"))
+# Tempo (s) durante o qual um resultado concluído é reaproveitado por jobs idênticos
+JOBS_RESULT_TTL_S = float(os.getenv("JOBS_RESULT_TTL_S", "300"))
+# Jobs concluídos/falhos há mais que isto (s) são apagados do armazenamento
+JOBS_RETENTION_S = float(os.getenv("JOBS_RETENTION_S", str(24 * 3600)))
+JOBS_PRUNE_INTERVAL_S = float(os.getenv("JOBS_PRUNE_INTERVAL_S", "600"))
+
+# --- Ciclo de vida dos artefatos gerados em app/static ---
+STATIC_DIR = os.getenv("STATIC_DIR", "app/static")
+ARTIFACT_TTL_S = float(os.getenv("ARTIFACT_TTL_S", str(24 * 3600)))  # desde o último acesso
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(200 * 1024 * 1024)))
+ARTIFACT_MAX_COUNT = int(os.getenv("ARTIFACT_MAX_COUNT", "500"))
+ARTIFACT_SWEEP_INTERVAL_S = float(os.getenv("ARTIFACT_SWEEP_INTERVAL_S", "300"))
+
+# --- Monitoramento de drift ---
+DRIFT_WINDOW_SIZE = int(os.getenv("DRIFT_WINDOW_SIZE", "500"))
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", "30"))
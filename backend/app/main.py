@@ -1,16 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from fastapi.middleware.cors import CORSMiddleware
-from app.services.chat_service import handle_chat_message
+from app.services.chat_service import handle_chat_message, llm_executor
+from app.services.job_service import job_manager, job_to_public
+from app.services.drift_service import drift_monitor, DRIFT_FEATURES_ORDER
 
-# (NOVO) Imports para servir arquivos
-from fastapi.staticfiles import StaticFiles
-import os
-
-# (NOVO) Define o diretório de estáticos e o cria
-STATIC_DIR = "app/static"
-os.makedirs(STATIC_DIR, exist_ok=True)
+# (NOVO) Servir arquivos gerados com ciclo de vida controlado (retenção + cache)
+from app.utils.artifact_store import artifact_store, ArtifactStaticFiles
 
 # --- Modelos Pydantic para Validação ---
 class ChatMessage(BaseModel):
@@ -23,11 +20,31 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     reply: str
+    charts: List[Dict[str, Any]] = []
+    timings: Dict[str, Union[int, float]] = {}  # tool_calls (int) e tempos em segundos
+    error: bool = False  # True quando o texto em 'reply' é uma mensagem de erro do servidor
+
+class JobRequest(BaseModel):
+    tool: str
+    args: Dict[str, Any] = {}
+    priority: int = 10
+
+class Reading(BaseModel):
+    type_machine: str
+    air_temp_k: float
+    process_temp_k: float
+    rotation_rpm: float
+    torque_nm: float
+    tool_wear_min: float
+
+class DriftScoreRequest(BaseModel):
+    readings: List[Reading]
+    observe: bool = True  # Se True, as leituras entram na janela de drift
 
 # --- Criação da Aplicação FastAPI ---
 app = FastAPI(
     title="API de Chatbot - Manutenção Preditiva",
-    description="Backend para o chatbot com Gemini e ferramentas de ML",
+    description="Backend para o chatbot com Gemini (ou backend de replay local) e ferramentas de ML",
     version="1.0.0"
 )
 
@@ -41,7 +58,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+app.mount("/static", ArtifactStaticFiles(directory=artifact_store.directory, store=artifact_store), name="static")
+
+@app.on_event("startup")
+def start_background_services():
+    artifact_store.start_sweeper()
+    # Inicia os workers já no startup para retomar jobs pendentes de uma execução anterior
+    job_manager.start()
+
 
 # --- Endpoint de "Saúde" ---
 @app.get("/")
@@ -59,13 +83,57 @@ async def chat_endpoint(request: ChatRequest):
         # Converte o histórico de Pydantic para dicts simples
         history_dicts = [msg.model_dump() for msg in request.history]
         
-        reply_text = await handle_chat_message(request.message, history_dicts)
+        result = await handle_chat_message(request.message, history_dicts)
         
-        return ChatResponse(reply=reply_text)
+        return ChatResponse(
+            reply=result["reply"], charts=result["charts"], timings=result["timings"], error=result["error"]
+        )
         
     except Exception as e:
         print(f"Erro no endpoint /chat: {e}")
-        return ChatResponse(reply=f"Erro interno no servidor: {str(e)}")
+        return ChatResponse(reply=f"Erro interno no servidor: {str(e)}", error=True)
+
+# --- (NOVO) Endpoints da fila de jobs ---
+@app.post("/jobs")
+def submit_job(request: JobRequest):
+    """Submete uma ferramenta pesada para execução em segundo plano."""
+    if not job_manager.is_registered(request.tool):
+        raise HTTPException(status_code=400, detail=f"Ferramenta '{request.tool}' não disponível na fila de jobs.")
+    job = job_manager.submit(request.tool, request.args, priority=request.priority)
+    return job_to_public(job)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Consulta estado, progresso e resultado de um job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' não encontrado.")
+    return job_to_public(job)
+
+# --- (NOVO) Endpoints de drift ---
+@app.get("/drift")
+def get_drift():
+    """Métricas de drift (PSI/KS) da janela de leituras recentes."""
+    return drift_monitor.report()
+
+@app.post("/drift/score")
+def score_drift(request: DriftScoreRequest):
+    """Score de anomalia por leitura para um lote, comparado à distribuição de treino."""
+    if not drift_monitor.enabled:
+        raise HTTPException(status_code=503, detail="Referência de drift não carregada.")
+    X = [[getattr(r, field) for field in DRIFT_FEATURES_ORDER] for r in request.readings]
+    types = [r.type_machine for r in request.readings]
+    if not X:
+        return {"scores": []}
+    if request.observe:
+        drift_monitor.observe(X, types)
+    return {"scores": drift_monitor.score(X, types)}
+
+@app.on_event("shutdown")
+def stop_background_services():
+    job_manager.stop()
+    artifact_store.stop_sweeper()
+    llm_executor.shutdown(wait=False, cancel_futures=True)
 
 # --- Ponto de entrada para Uvicorn (opcional, mas bom para debug) ---
 if __name__ == "__main__":
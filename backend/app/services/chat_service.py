@@ -1,7 +1,14 @@
-import google.generativeai as genai
-from google.generativeai.types import content_types, HarmCategory, HarmBlockThreshold
-from app.core.config import GOOGLE_API_KEY
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import (
+    GOOGLE_API_KEY, JOBS_CHAT_WAIT_S, LLM_BACKEND, GEMINI_MODEL_NAME,
+    REPLAY_FILE, REPLAY_LATENCY_S, REPLAY_JITTER_S, LLM_MAX_CONCURRENCY
+)
+from app.services.llm_backends import create_backend
 from app.services import ml_service
+from app.services.job_service import job_manager, job_to_public, get_job_status, DONE, FAILED
+from app.services.drift_service import get_drift_report
 import json
 import logging
 import os
@@ -11,9 +18,6 @@ from pathlib import Path
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configurar API Key
-genai.configure(api_key=GOOGLE_API_KEY)
-
 # (NOVO) Carrega o prompt das colunas do JSON
 def load_columns_prompt():
     try:
@@ -39,24 +43,31 @@ Sua tarefa é usar as ferramentas fornecidas para responder às solicitações d
 
 {columns_prompt}
 
-IMPORTANTE - RENDERIZAÇÃO DE IMAGENS:
-Quando as ferramentas `generate_explanation` ou `plot_data_distribution`
-retornarem uma resposta de função JSON (Function Response),
-você DEVE extrair o valor da chave "image_url" desse JSON.
+IMPORTANTE - PERGUNTAS SOBRE O DATASET:
+Para perguntas com filtros, agrupamentos ou agregações (ex: "quantas máquinas H com
+torque acima de 60 falharam, por tipo de falha?"), use UMA chamada a `query_dataset`
+em vez de combinar várias ferramentas. Ex: filters="Type == 'H' and Torque [Nm] > 60",
+group_by="Failure Type", aggregates="count, mean(Torque [Nm])".
 
-O JSON se parecerá com:
-{{"image_url": "http://localhost:8000/static/plot_abc123.png"}}
+IMPORTANTE - GRÁFICOS:
+As ferramentas `generate_explanation` e `plot_data_distribution` retornam, por padrão,
+os dados do gráfico. O gráfico é desenhado automaticamente pela interface logo abaixo
+da sua resposta: a resposta da função trará {{"chart_displayed": {{"title": "..."}}}}.
+Nesse caso, NÃO gere tags <img> nem links; apenas comente o gráfico em texto.
 
-Para exibir a imagem no chat, você DEVE usar uma tag HTML <img>.
-Use o valor de "image_url" diretamente na propriedade 'src'.
-
-Exemplo de Resposta Correta (o que você deve gerar):
-Claro, aqui está o gráfico:
+Somente se o usuário pedir explicitamente para exportar/baixar a imagem, chame a
+ferramenta com export_png=True. Ela retornará {{"image_url": "http://localhost:8000/static/plot_abc123.png"}}.
+Para exibir essa imagem, use uma tag HTML <img> com o valor de "image_url" na propriedade 'src':
 <img src="http://localhost:8000/static/plot_abc123.png" alt="Descrição do Gráfico" style="width: 100%; max-width: 600px;">
-
 NUNCA use o formato Markdown (![alt](link)).
-SEMPRE use a tag HTML <img src="..."> com o valor completo
-da chave "image_url" e adicione um estilo (style) para limitar o tamanho.
+
+IMPORTANTE - ANÁLISES EM SEGUNDO PLANO:
+Ferramentas pesadas rodam em uma fila de jobs. Se a resposta da ferramenta vier com
+"status": "queued" ou "running" e um "job_id", a análise ainda não terminou.
+Nesse caso, informe ao usuário que a análise está em andamento, cite o job_id e o
+progresso, e diga que ele pode perguntar pelo resultado depois. Quando o usuário
+perguntar por uma análise pendente, chame `get_job_status` com o job_id citado
+anteriormente na conversa; se o status for "done", use o campo "result" normalmente.
 """
 
 # --- (Mapeamento de ferramentas permanece o mesmo) ---
@@ -64,92 +75,147 @@ available_tools = {
     "run_prediction": ml_service.run_prediction,
     "generate_explanation": ml_service.generate_explanation,
     "get_dataset_summary": ml_service.get_dataset_summary,
-    "plot_data_distribution": ml_service.plot_data_distribution
+    "query_dataset": ml_service.query_dataset,
+    "plot_data_distribution": ml_service.plot_data_distribution,
+    "get_job_status": get_job_status,
+    "get_drift_report": get_drift_report
 }
 
+# (NOVO) Ferramentas pesadas rodam na fila de jobs, fora do handler HTTP
+HEAVY_TOOLS = {"generate_explanation", "plot_data_distribution"}
+for _tool_name in HEAVY_TOOLS:
+    job_manager.register_tool(_tool_name, available_tools[_tool_name])
+
 tools_list = [
     ml_service.run_prediction,
     ml_service.generate_explanation,
     ml_service.get_dataset_summary,
-    ml_service.plot_data_distribution
+    ml_service.query_dataset,
+    ml_service.plot_data_distribution,
+    get_job_status,
+    get_drift_report
 ]
 
-# --- (Configuração do modelo permanece a mesma) ---
-gemini_model = genai.GenerativeModel(
-    model_name='gemini-2.5-pro', # (Mantém a correção do modelo)
+# --- (MODIFICADO) Backend de LLM plugável: Gemini em produção, replay local para testes ---
+llm_backend = create_backend(
+    LLM_BACKEND,
+    api_key=GOOGLE_API_KEY,
+    model_name=GEMINI_MODEL_NAME,
     system_instruction=system_instruction,
     tools=tools_list,
-    safety_settings={ 
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-    }
+    replay_file=REPLAY_FILE,
+    latency_s=REPLAY_LATENCY_S,
+    jitter_s=REPLAY_JITTER_S
 )
 
-logger.info("Serviço de Chat: Modelo Gemini configurado.")
+logger.info(f"Serviço de Chat: backend de LLM '{llm_backend.name}' configurado.")
+
+# Executor dedicado às chamadas ao modelo (o executor padrão do asyncio é limitado a
+# min(32, CPUs + 4) threads e compartilhado com o resto da aplicação)
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
 
+async def run_heavy_tool(function_name: str, function_args: dict) -> str:
+    """
+    Submete uma ferramenta pesada à fila de jobs e aguarda até JOBS_CHAT_WAIT_S.
+    Se o job não terminar a tempo, retorna o estado pendente (com job_id) para o assistente.
+    """
+    job = job_manager.submit(function_name, function_args)
+    job = await job_manager.wait(job["id"], timeout=JOBS_CHAT_WAIT_S)
+    if job["status"] == DONE:
+        return job["result"]
+    if job["status"] == FAILED:
+        return json.dumps({"error": f"Erro ao executar a ferramenta: {job['error']}", "job_id": job["id"]})
+    pending = job_to_public(job)
+    pending["poll_url"] = f"{ml_service.BACKEND_BASE_URL}/jobs/{job['id']}"
+    return json.dumps(pending, default=str)
+
+
+def extract_charts(response_dict: dict, charts: list) -> dict:
+    """
+    Remove os payloads de gráfico (chave "chart", também dentro de "result" de jobs)
+    da resposta enviada ao Gemini, acumulando-os em `charts` para o frontend.
+    """
+    if not isinstance(response_dict, dict):
+        return response_dict
+    cleaned = dict(response_dict)
+    if isinstance(cleaned.get("chart"), dict) and cleaned["chart"]:
+        chart = cleaned.pop("chart")
+        charts.append(chart)
+        cleaned["chart_displayed"] = {"title": chart.get("title"), "type": chart.get("type")}
+    if isinstance(cleaned.get("result"), dict):
+        cleaned["result"] = extract_charts(cleaned["result"], charts)
+    return cleaned
 
-def transform_history_to_gemini(history: list) -> list:
-    """Converte histórico do frontend para o formato do Gemini."""
-    new_history = []
-    for item in history:
-        if item['role'] not in ['user', 'model']:
-            continue
-        new_history.append({
-            "parts": [{"text": item['content']}],
-            "role": item['role']
-        })
-    return new_history
 
 # ===================================================================
 # (NOVO) LÓGICA DE CHAT REFEITA PARA MAIOR ROBUSTEZ
 # ===================================================================
-async def handle_chat_message(message: str, history: list) -> str:
-    """Processa uma nova mensagem, gerencia chamadas de função e retorna a resposta final."""
-    global gemini_model, available_tools
+async def handle_chat_message(message: str, history: list) -> dict:
+    """
+    Processa uma nova mensagem, gerencia chamadas de função e retorna a resposta final
+    como {"reply": texto, "charts": [gráficos], "timings": {...}, "error": bool}.
+    Em "timings", "model_s" é o tempo dentro das chamadas ao modelo e "model_queue_s"
+    o tempo em que elas esperaram por uma thread livre do executor.
+    """
+    global llm_backend, available_tools
+    charts = []
+    timings = {"model_s": 0.0, "model_queue_s": 0.0, "tools_s": 0.0, "tool_calls": 0}
+
+    async def call_model(func, *args):
+        # Chamadas ao modelo são bloqueantes: rodam no executor dedicado para não travar o
+        # event loop. O cronômetro do modelo só começa quando a thread inicia a chamada.
+        submitted = time.perf_counter()
+
+        def timed_call():
+            started = time.perf_counter()
+            timings["model_queue_s"] += started - submitted
+            try:
+                return func(*args)
+            finally:
+                timings["model_s"] += time.perf_counter() - started
+
+        return await asyncio.get_running_loop().run_in_executor(llm_executor, timed_call)
+
+    def result(reply: str, error: bool = False) -> dict:
+        return {"reply": reply, "charts": charts, "timings": timings, "error": error}
     
     try:
-        gemini_history = transform_history_to_gemini(history)
-        chat_session = gemini_model.start_chat(history=gemini_history)
+        chat_session = llm_backend.start_chat(history)
         
-        logger.info(f"[USER] Enviando mensagem para o Gemini: '{message}'")
-        response = chat_session.send_message(message)
+        logger.info(f"[USER] Enviando mensagem para o modelo: '{message}'")
+        response = await call_model(chat_session.send_message, message)
 
         # (NOVO) Loop de processamento mais seguro
         # Limita a 5 turnos de função para evitar loops infinitos
         for _ in range(5):
-            response.resolve() # Resolve a resposta
-
             # --- CASO 1: Resposta de TEXTO (Caminho Feliz) ---
-            # Verifica se a resposta NÃO é uma chamada de função
-            if not response.parts or not response.parts[0].function_call:
-                logger.info(f"[GEMINI] Respondeu com texto: '{response.text[:80]}...'")
-                return response.text
+            if response.function_call is None:
+                logger.info(f"[MODELO] Respondeu com texto: '{response.text[:80]}...'")
+                return result(response.text)
 
             # --- CASO 2: Resposta com CHAMADA DE FUNÇÃO ---
-            function_call = response.parts[0].function_call
-            function_name = function_call.name
-            function_args = dict(function_call.args)
+            function_name = response.function_call.name
+            function_args = response.function_call.args
             
-            logger.info(f"[GEMINI] Solicitou ferramenta: {function_name}({function_args})")
+            logger.info(f"[MODELO] Solicitou ferramenta: {function_name}({function_args})")
 
+            tool_start = time.perf_counter()
+            timings["tool_calls"] += 1
             # Verifica se a ferramenta existe
             if function_name not in available_tools:
                 logger.error(f"Ferramenta desconhecida solicitada: {function_name}")
-                function_response_part = content_types.to_part({
-                    "function_response": {
-                        "name": function_name,
-                        "response": {"error": f"Ferramenta desconhecida: {function_name}"}
-                    }
-                })
+                function_response_dict = {"error": f"Ferramenta desconhecida: {function_name}"}
             else:
                 # --- Executar a ferramenta ---
                 try:
                     function_to_call = available_tools[function_name]
                     
-                    # Executa a função do ml_service
-                    function_response_str = function_to_call(**function_args)
+                    # Executa a função do ml_service (as pesadas vão para a fila de jobs)
+                    if function_name in HEAVY_TOOLS:
+                        function_response_str = await run_heavy_tool(function_name, function_args)
+                    else:
+                        function_response_str = function_to_call(**function_args)
                     logger.info(f"[TOOL] Ferramenta '{function_name}' retornou: {function_response_str[:100]}...")
                     
                     # Tenta carregar a string de resposta como JSON
@@ -160,41 +226,31 @@ async def handle_chat_message(message: str, history: list) -> str:
                         # Se não for JSON (ex: um erro de string simples), embala em um dict
                         function_response_dict = {"result": function_response_str}
 
-                    # Prepara a resposta da função para o Gemini
-                    function_response_part = content_types.to_part({
-                        "function_response": {
-                            "name": function_name,
-                            "response": function_response_dict
-                        }
-                    })
+                    # Gráficos vão direto para o frontend; o modelo recebe só um resumo
+                    function_response_dict = extract_charts(function_response_dict, charts)
                     
                 except Exception as tool_error:
                     # Pega erros *dentro* da execução da ferramenta (ex: coluna não existe)
                     logger.error(f"Erro ao executar a ferramenta '{function_name}': {tool_error}", exc_info=True)
-                    function_response_part = content_types.to_part({
-                        "function_response": {
-                            "name": function_name,
-                            "response": {"error": f"Erro interno ao executar a ferramenta: {str(tool_error)}"}
-                        }
-                    })
+                    function_response_dict = {"error": f"Erro interno ao executar a ferramenta: {str(tool_error)}"}
+            timings["tools_s"] += time.perf_counter() - tool_start
             
-            # Envia a resposta da função de volta para o Gemini
-            logger.info("Enviando resposta da função de volta para o Gemini...")
-            response = chat_session.send_message(function_response_part)
+            # Envia a resposta da função de volta para o modelo
+            logger.info("Enviando resposta da função de volta para o modelo...")
+            response = await call_model(chat_session.send_function_response, function_name, function_response_dict)
             # O loop continua, e a próxima iteração verificará se a nova `response` é texto ou outra função
 
         # Se sair do loop (mais de 5 turnos), algo está errado.
         logger.warning("Loop de função excedeu 5 turnos. Retornando última resposta de texto.")
-        # (NOVO) Tenta retornar o texto, se falhar, retorna um erro padrão
-        try:
-            return response.text
-        except Exception:
-            logger.error("Falha final ao tentar obter texto após loop de função.")
-            return "Ocorreu um erro de comunicação com o assistente após múltiplas etapas. Por favor, tente novamente."
+        # (NOVO) Se a última resposta ainda for uma chamada de função, retorna um erro padrão
+        if response.function_call is None:
+            return result(response.text)
+        logger.error("Falha final ao tentar obter texto após loop de função.")
+        return result("Ocorreu um erro de comunicação com o assistente após múltiplas etapas. Por favor, tente novamente.", error=True)
 
     except Exception as e:
         # Pega o erro 'Could not convert...' e outros erros de alto nível
         logger.error(f"Erro principal no handle_chat_message: {e}", exc_info=True)
         if "Could not convert" in str(e):
-            return "Ocorreu um erro de comunicação com o assistente. Por favor, tente reformular sua pergunta."
-        return f"Ocorreu um erro no servidor ao processar sua solicitação: {str(e)}"
\ No newline at end of file
+            return result("Ocorreu um erro de comunicação com o assistente. Por favor, tente reformular sua pergunta.", error=True)
+        return result(f"Ocorreu um erro no servidor ao processar sua solicitação: {str(e)}", error=True)
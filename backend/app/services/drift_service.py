@@ -0,0 +1,131 @@
+import json
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import DRIFT_WINDOW_SIZE, DRIFT_MIN_SAMPLES
+from app.utils.drift_stats import (
+    ReferenceArrays, score_rows, population_stability_index, ks_statistic, psi_severity
+)
+
+logger = logging.getLogger(__name__)
+
+DRIFT_REFERENCE_PATH = Path('models/drift_reference.json')
+
+# Campos das leituras da API na mesma ordem de DRIFT_FEATURES
+DRIFT_FEATURES_ORDER = ["air_temp_k", "process_temp_k", "rotation_rpm", "torque_nm", "tool_wear_min"]
+
+
+def load_reference():
+    """Carrega o artefato de referência gerado pelo train.py (None se ausente)."""
+    try:
+        with open(DRIFT_REFERENCE_PATH, 'r', encoding='utf-8') as f:
+            return ReferenceArrays(json.load(f))
+    except FileNotFoundError:
+        logger.warning("Arquivo drift_reference.json não encontrado. Monitoramento de drift desativado.")
+    except Exception as e:
+        logger.error(f"Erro ao carregar drift_reference.json: {e}")
+    return None
+
+
+class DriftMonitor:
+    """
+    Mantém as últimas `window_size` leituras recebidas em um ring buffer NumPy e calcula,
+    sob demanda, PSI e KS por feature contra a distribuição de treino.
+    Registrar uma leitura custa O(1); o relatório custa O(janela), nunca O(dataset).
+    """
+
+    def __init__(self, reference: ReferenceArrays, window_size: int, min_samples: int):
+        self.reference = reference
+        self.window_size = max(1, window_size)
+        self.min_samples = min_samples
+        n_features = len(reference.features) if reference else 0
+        self._window = np.zeros((self.window_size, n_features), dtype=np.float64)
+        self._types = np.zeros(self.window_size, dtype=np.int64)
+        self._head = 0
+        self._count = 0
+        self._total_seen = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.reference is not None
+
+    def observe(self, X: np.ndarray, types) -> None:
+        """Adiciona um lote de leituras (n x n_features) à janela."""
+        if not self.enabled:
+            return
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))[-self.window_size:]
+        codes = self.reference.type_codes(types)[-self.window_size:]
+        n = len(X)
+        with self._lock:
+            positions = (self._head + np.arange(n)) % self.window_size
+            self._window[positions] = X
+            self._types[positions] = codes
+            self._head = (self._head + n) % self.window_size
+            self._count = min(self.window_size, self._count + n)
+            self._total_seen += n
+
+    def score(self, X: np.ndarray, types) -> list:
+        """Score de anomalia por linha para um lote de leituras."""
+        if not self.enabled:
+            return []
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        scores = score_rows(self.reference, X, self.reference.type_codes(types))
+        features = np.array(self.reference.features)
+        return [
+            {
+                "anomaly_score": round(float(z), 4),
+                "out_of_range_features": features[mask].tolist()
+            }
+            for z, mask in zip(scores["max_abs_z"], scores["out_of_range"])
+        ]
+
+    def report(self) -> dict:
+        """Métricas de drift da janela atual."""
+        if not self.enabled:
+            return {"error": "Referência de drift não carregada. Execute o 'train.py' novamente."}
+        with self._lock:
+            X = self._window[:self._count].copy()
+            codes = self._types[:self._count].copy()
+            total_seen = self._total_seen
+        result = {"window_size": self.window_size, "samples_in_window": int(len(X)), "total_readings": total_seen}
+        if len(X) < self.min_samples:
+            result["status"] = f"Leituras insuficientes para avaliar drift (mínimo {self.min_samples})."
+            return result
+
+        psi = population_stability_index(self.reference, X)
+        ks = ks_statistic(self.reference, X)
+        scores = score_rows(self.reference, X, codes)
+        result["features"] = {
+            feature: {
+                "psi": round(float(psi[j]), 4),
+                "ks": round(float(ks[j]), 4),
+                "severity": psi_severity(psi[j]),
+                "window_mean": round(float(X[:, j].mean()), 4),
+                "out_of_range_rate": round(float(scores["out_of_range"][:, j].mean()), 4),
+            }
+            for j, feature in enumerate(self.reference.features)
+        }
+        result["max_psi"] = round(float(psi.max()), 4)
+        result["overall_severity"] = psi_severity(psi.max())
+        result["anomalous_rows_rate"] = round(float(scores["out_of_range"].any(axis=1).mean()), 4)
+        return result
+
+
+# --- Instância padrão usada pela aplicação ---
+drift_monitor = DriftMonitor(load_reference(), DRIFT_WINDOW_SIZE, DRIFT_MIN_SAMPLES)
+
+
+# ===================================================================
+# FERRAMENTA PARA O GEMINI
+# ===================================================================
+
+def get_drift_report() -> str:
+    """
+    Retorna as métricas de drift (PSI, KS e taxa de leituras fora da faixa de treino)
+    das leituras recentes enviadas para previsão, comparadas à distribuição de treino.
+    """
+    return json.dumps(drift_monitor.report())
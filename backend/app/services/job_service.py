@@ -0,0 +1,452 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+
+from app.core.config import (
+    JOBS_DB_PATH, JOBS_MAX_WORKERS, JOBS_RESULT_TTL_S, JOBS_RETENTION_S, JOBS_PRUNE_INTERVAL_S
+)
+
+logger = logging.getLogger(__name__)
+
+# Estados possíveis de um job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATES = (QUEUED, RUNNING)
+FINAL_STATES = (DONE, FAILED)
+
+_JOB_FIELDS = (
+    "id", "dedupe_key", "tool", "args", "priority", "status", "progress",
+    "message", "result", "error", "created_at", "started_at", "finished_at"
+)
+
+
+def make_dedupe_key(tool: str, args: dict) -> str:
+    """Chave determinística para (ferramenta, argumentos), usada na deduplicação."""
+    payload = json.dumps({"tool": tool, "args": args}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ===================================================================
+# BACKENDS DE ARMAZENAMENTO
+# ===================================================================
+
+class JobStore(ABC):
+    """Interface de armazenamento de jobs. Cada job é um dict com os campos de _JOB_FIELDS."""
+
+    @abstractmethod
+    def insert(self, job: dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_reusable(self, dedupe_key: str, min_finished_at: float) -> Optional[dict]:
+        """Retorna um job ativo ou concluído com sucesso após `min_finished_at` com a mesma chave."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_active(self) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    def prune_finished(self, finished_before: float) -> int:
+        """Apaga jobs em estado final concluídos antes de `finished_before`; retorna quantos."""
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """Armazenamento em memória (não sobrevive a reinícios)."""
+
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def insert(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def find_reusable(self, dedupe_key, min_finished_at):
+        with self._lock:
+            for job in sorted(self._jobs.values(), key=lambda j: j["created_at"], reverse=True):
+                if job["dedupe_key"] != dedupe_key:
+                    continue
+                if job["status"] in ACTIVE_STATES:
+                    return dict(job)
+                if job["status"] == DONE and (job["finished_at"] or 0) >= min_finished_at:
+                    return dict(job)
+            return None
+
+    def list_active(self):
+        with self._lock:
+            return [dict(j) for j in self._jobs.values() if j["status"] in ACTIVE_STATES]
+
+    def prune_finished(self, finished_before):
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in FINAL_STATES and (job["finished_at"] or 0) < finished_before
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """Armazenamento local em SQLite (padrão). Uma conexão compartilhada protegida por lock."""
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    dedupe_key TEXT NOT NULL,
+                    tool TEXT NOT NULL,
+                    args TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs (dedupe_key, status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (status, finished_at)")
+
+    def _row_to_job(self, row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["args"] = json.loads(job["args"])
+        return job
+
+    def insert(self, job):
+        row = dict(job, args=json.dumps(job["args"], default=str))
+        placeholders = ", ".join("?" for _ in _JOB_FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(_JOB_FIELDS)}) VALUES ({placeholders})",
+                [row[f] for f in _JOB_FIELDS]
+            )
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def update(self, job_id, **fields):
+        if not fields:
+            return
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                [*fields.values(), job_id]
+            )
+
+    def find_reusable(self, dedupe_key, min_finished_at):
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE dedupe_key = ?
+                  AND (status IN (?, ?) OR (status = ? AND finished_at >= ?))
+                ORDER BY created_at DESC LIMIT 1
+                """,
+                (dedupe_key, QUEUED, RUNNING, DONE, min_finished_at)
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def list_active(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def prune_finished(self, finished_before):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, finished_before)
+            )
+        return cursor.rowcount
+
+
+# ===================================================================
+# GERENCIADOR DE JOBS
+# ===================================================================
+
+# Guarda o id do job em execução na thread atual (usado por report_progress)
+_current = threading.local()
+
+
+def report_progress(progress: float, message: str = "") -> None:
+    """
+    Reporta o progresso (0.0 a 1.0) do job em execução na thread atual.
+    Fora de um job (ex: ferramenta chamada diretamente) não faz nada.
+    """
+    manager = getattr(_current, "manager", None)
+    job_id = getattr(_current, "job_id", None)
+    if manager is None or job_id is None:
+        return
+    manager.store.update(job_id, progress=max(0.0, min(1.0, float(progress))), message=message)
+
+
+class JobManager:
+    """
+    Fila de prioridade em processo com número limitado de workers.
+    Menor `priority` = executa antes. Jobs idênticos (mesma ferramenta e argumentos)
+    ativos ou recém-concluídos são reaproveitados em vez de executados de novo.
+    Jobs finalizados há mais de `retention_s` são apagados no início e a cada
+    `prune_interval_s` (0 desativa a limpeza).
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 2, result_ttl_s: float = 300.0,
+                 retention_s: float = 24 * 3600.0, prune_interval_s: float = 600.0):
+        self.store = store
+        self.max_workers = max(1, max_workers)
+        self.result_ttl_s = result_ttl_s
+        # Nunca apaga resultados que ainda podem ser reaproveitados pela deduplicação
+        self.retention_s = max(retention_s, result_ttl_s) if retention_s > 0 else 0.0
+        self.prune_interval_s = prune_interval_s
+        self._stop_pruner = threading.Event()
+        self._pruner = None
+        self._tools: Dict[str, Callable[..., str]] = {}
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._submit_lock = threading.Lock()
+        self._workers: list = []
+        self._started = False
+
+    # --- Registro de ferramentas ---
+    def register_tool(self, name: str, func: Callable[..., str]) -> None:
+        self._tools[name] = func
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._tools
+
+    # --- Ciclo de vida ---
+    def prune(self) -> int:
+        """Apaga os jobs finalizados há mais de `retention_s` e retorna quantos foram removidos."""
+        if self.retention_s <= 0:
+            return 0
+        removed = self.store.prune_finished(time.time() - self.retention_s)
+        if removed:
+            logger.info(f"[JOBS] {removed} job(s) finalizado(s) removido(s) pela política de retenção.")
+        return removed
+
+    def _prune_loop(self) -> None:
+        while not self._stop_pruner.wait(self.prune_interval_s):
+            try:
+                self.prune()
+            except Exception as e:
+                logger.error(f"[JOBS] Erro na limpeza de jobs: {e}", exc_info=True)
+
+    def start(self) -> None:
+        """Inicia os workers e reenfileira jobs que ficaram pendentes de uma execução anterior."""
+        with self._submit_lock:
+            if self._started:
+                return
+            self._started = True
+            self.prune()
+            for job in self.store.list_active():
+                if job["tool"] in self._tools:
+                    self.store.update(job["id"], status=QUEUED, progress=0.0, started_at=None)
+                    self._queue.put((job["priority"], next(self._seq), job["id"]))
+                else:
+                    self.store.update(job["id"], status=FAILED, finished_at=time.time(),
+                                      error=f"Ferramenta '{job['tool']}' não registrada após reinício.")
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            if self.retention_s > 0 and self.prune_interval_s > 0:
+                self._stop_pruner.clear()
+                self._pruner = threading.Thread(target=self._prune_loop, name="job-pruner", daemon=True)
+                self._pruner.start()
+        logger.info(f"JobManager iniciado com {self.max_workers} worker(s).")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._submit_lock:
+            if not self._started:
+                return
+            for _ in self._workers:
+                # Sentinela com prioridade mínima: só é consumida depois dos jobs já enfileirados
+                self._queue.put((float("inf"), next(self._seq), None))
+            workers, self._workers = self._workers, []
+            pruner, self._pruner = self._pruner, None
+            self._started = False
+        self._stop_pruner.set()
+        for worker in workers:
+            worker.join(timeout=timeout)
+        if pruner:
+            pruner.join(timeout=timeout)
+
+    # --- Submissão e consulta ---
+    def submit(self, tool: str, args: Optional[dict] = None, priority: int = 10) -> dict:
+        """Enfileira (ou reaproveita) um job e retorna seu estado atual."""
+        if tool not in self._tools:
+            raise KeyError(f"Ferramenta desconhecida: {tool}")
+        args = args or {}
+        dedupe_key = make_dedupe_key(tool, args)
+        if not self._started:
+            self.start()
+
+        with self._submit_lock:
+            existing = self.store.find_reusable(dedupe_key, time.time() - self.result_ttl_s)
+            if existing:
+                logger.info(f"[JOBS] Reaproveitando job {existing['id']} ({tool}, {existing['status']})")
+                return existing
+
+            job = {
+                "id": uuid.uuid4().hex,
+                "dedupe_key": dedupe_key,
+                "tool": tool,
+                "args": args,
+                "priority": int(priority),
+                "status": QUEUED,
+                "progress": 0.0,
+                "message": None,
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+            }
+            self.store.insert(job)
+            self._queue.put((job["priority"], next(self._seq), job["id"]))
+        logger.info(f"[JOBS] Job {job['id']} enfileirado: {tool}({args}) prioridade={priority}")
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.store.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float, poll_interval: float = 0.05) -> Optional[dict]:
+        """
+        Aguarda (sem bloquear o event loop) até o job terminar ou o timeout expirar.
+        Retorna o estado mais recente do job.
+        """
+        deadline = time.monotonic() + timeout
+        job = self.store.get(job_id)
+        while job and job["status"] not in FINAL_STATES and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            job = self.store.get(job_id)
+        return job
+
+    # --- Execução ---
+    def _worker_loop(self) -> None:
+        while True:
+            _, _, job_id = self._queue.get()
+            try:
+                if job_id is None:
+                    return
+                self._run_job(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+        func = self._tools.get(job["tool"])
+        self.store.update(job_id, status=RUNNING, started_at=time.time())
+        _current.manager, _current.job_id = self, job_id
+        try:
+            result = func(**job["args"])
+            self.store.update(job_id, status=DONE, progress=1.0, result=result, finished_at=time.time())
+            logger.info(f"[JOBS] Job {job_id} ({job['tool']}) concluído.")
+        except Exception as e:
+            logger.error(f"[JOBS] Job {job_id} ({job['tool']}) falhou: {e}", exc_info=True)
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+        finally:
+            _current.manager, _current.job_id = None, None
+
+
+def job_to_public(job: dict) -> dict:
+    """Representação do job para a API e para o assistente (sem campos internos)."""
+    result = job.get("result")
+    if result is not None:
+        try:
+            result = json.loads(result)
+        except (TypeError, json.JSONDecodeError):
+            result = {"result": result}
+    return {
+        "job_id": job["id"],
+        "tool": job["tool"],
+        "args": job["args"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job.get("message"),
+        "result": result,
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+# --- Instância padrão usada pela aplicação ---
+job_manager = JobManager(
+    store=SQLiteJobStore(JOBS_DB_PATH),
+    max_workers=JOBS_MAX_WORKERS,
+    result_ttl_s=JOBS_RESULT_TTL_S,
+    retention_s=JOBS_RETENTION_S,
+    prune_interval_s=JOBS_PRUNE_INTERVAL_S
+)
+
+
+# ===================================================================
+# FERRAMENTA PARA O GEMINI
+# ===================================================================
+
+def get_job_status(job_id: str) -> str:
+    """
+    Consulta o estado de uma análise em segundo plano (job) pelo seu 'job_id'.
+    Retorna status ('queued', 'running', 'done', 'failed'), progresso e, se concluído, o resultado.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return json.dumps({"error": f"Job '{job_id}' não encontrado."})
+    return json.dumps(job_to_public(job), default=str)
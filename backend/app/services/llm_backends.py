@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FunctionCall:
+    name: str
+    args: dict = field(default_factory=dict)
+
+
+@dataclass
+class LLMReply:
+    """Resposta normalizada do modelo: texto final OU uma chamada de função."""
+    text: str = ""
+    function_call: Optional[FunctionCall] = None
+
+
+class ChatSession(ABC):
+    """Sessão de conversa com o modelo (uma por requisição do /chat)."""
+
+    @abstractmethod
+    def send_message(self, message: str) -> LLMReply:
+        raise NotImplementedError
+
+    @abstractmethod
+    def send_function_response(self, name: str, response: dict) -> LLMReply:
+        raise NotImplementedError
+
+
+class LLMBackend(ABC):
+    """Interface dos backends de LLM usados pelo chat_service."""
+
+    name = "base"
+
+    @abstractmethod
+    def start_chat(self, history: list) -> ChatSession:
+        """`history` no formato do frontend: [{"role": "user"|"model", "content": "..."}]."""
+        raise NotImplementedError
+
+
+# ===================================================================
+# GEMINI (produção)
+# ===================================================================
+
+class GeminiChatSession(ChatSession):
+    def __init__(self, session):
+        self._session = session
+
+    @staticmethod
+    def _normalize(response) -> LLMReply:
+        response.resolve()
+        if response.parts and response.parts[0].function_call:
+            call = response.parts[0].function_call
+            return LLMReply(function_call=FunctionCall(name=call.name, args=dict(call.args)))
+        return LLMReply(text=response.text)
+
+    def send_message(self, message):
+        return self._normalize(self._session.send_message(message))
+
+    def send_function_response(self, name, response):
+        from google.generativeai.types import content_types
+
+        part = content_types.to_part({"function_response": {"name": name, "response": response}})
+        return self._normalize(self._session.send_message(part))
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, api_key: str, model_name: str, system_instruction: str, tools: list):
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY não definida no arquivo .env")
+        import google.generativeai as genai
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+        genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(
+            model_name=model_name,
+            system_instruction=system_instruction,
+            tools=tools,
+            safety_settings={
+                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+            }
+        )
+
+    def start_chat(self, history):
+        gemini_history = [
+            {"parts": [{"text": item['content']}], "role": item['role']}
+            for item in history if item['role'] in ['user', 'model']
+        ]
+        return GeminiChatSession(self._model.start_chat(history=gemini_history))
+
+
+# ===================================================================
+# REPLAY (substituto local e determinístico para testes de carga)
+# ===================================================================
+
+class ReplayChatSession(ChatSession):
+    """Devolve, em ordem, os passos gravados do modelo para a conversa escolhida."""
+
+    def __init__(self, backend: "ReplayBackend", rng: random.Random):
+        self._backend = backend
+        self._rng = rng
+        self._steps = None  # Definidos na primeira mensagem da sessão
+
+    def _next(self) -> LLMReply:
+        delay = self._backend.latency_s
+        if self._backend.jitter_s:
+            delay += self._rng.uniform(0, self._backend.jitter_s)
+        if delay > 0:
+            time.sleep(delay)
+        if not self._steps:
+            return LLMReply(text="(replay) Fim da conversa gravada.")
+        step = self._steps.pop(0)
+        if "function_call" in step:
+            call = step["function_call"]
+            return LLMReply(function_call=FunctionCall(name=call["name"], args=dict(call.get("args", {}))))
+        return LLMReply(text=step.get("text", ""))
+
+    def send_message(self, message):
+        if self._steps is None:
+            self._steps = list(self._backend.pick(message)["steps"])
+        return self._next()
+
+    def send_function_response(self, name, response):
+        return self._next()
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Reproduz conversas gravadas em JSON, sem rede:
+    [{"user": "mensagem", "steps": [{"function_call": {"name": ..., "args": {...}}}, {"text": "..."}]}, ...]
+    A conversa é escolhida pela mensagem exata ou, se não houver, pelo hash da mensagem.
+    A latência simulada por chamada ao modelo é `latency_s` + U(0, `jitter_s`) (semente fixa).
+    """
+
+    name = "replay"
+
+    def __init__(self, conversations: list, latency_s: float = 0.0, jitter_s: float = 0.0, seed: int = 42):
+        if not conversations:
+            raise ValueError("Nenhuma conversa gravada para o backend de replay.")
+        self.conversations = conversations
+        self._by_message = {c["user"]: c for c in conversations}
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ReplayBackend":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    def pick(self, message: str) -> dict:
+        if message in self._by_message:
+            return self._by_message[message]
+        digest = int(hashlib.sha256(message.encode("utf-8")).hexdigest(), 16)
+        return self.conversations[digest % len(self.conversations)]
+
+    def start_chat(self, history):
+        with self._rng_lock:
+            session_rng = random.Random(self._rng.random())
+        return ReplayChatSession(self, session_rng)
+
+
+def create_backend(kind: str, **kwargs) -> LLMBackend:
+    """Fábrica usada pelo chat_service a partir de LLM_BACKEND ('gemini' ou 'replay')."""
+    if kind == "gemini":
+        return GeminiBackend(
+            api_key=kwargs["api_key"],
+            model_name=kwargs["model_name"],
+            system_instruction=kwargs["system_instruction"],
+            tools=kwargs["tools"]
+        )
+    if kind == "replay":
+        return ReplayBackend.from_file(
+            kwargs["replay_file"],
+            latency_s=kwargs.get("latency_s", 0.0),
+            jitter_s=kwargs.get("jitter_s", 0.0)
+        )
+    raise ValueError(f"LLM_BACKEND desconhecido: '{kind}'. Use 'gemini' ou 'replay'.")
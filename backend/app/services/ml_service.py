@@ -2,7 +2,16 @@ import joblib
 import pandas as pd
 import numpy as np
 import json
-from app.utils.plotting import create_feature_importance_plot, create_data_distribution_plot
+from app.utils.plotting import (
+    create_feature_importance_plot, create_data_distribution_plot,
+    compute_feature_importance, compute_data_distribution
+)
+from app.services.job_service import report_progress
+from app.services.drift_service import drift_monitor
+from app.utils.query_engine import ColumnResolver, DatasetIndex, QueryError, run_query
+from app.utils.rolling_state import (
+    RollingStateStore, DEFAULT_WINDOW, extract_signals, single_reading_features
+)
 
 BACKEND_BASE_URL = "http://localhost:8000"
 
@@ -20,6 +29,8 @@ try:
     with open('models/features_info.json', 'r') as f:
         features_info = json.load(f)
         
+    CLASS_FEATURES = features_info['classification_features']
+    REG_FEATURES = features_info['regression_features']
     CLASS_FEATURES_CLEANED = features_info['classification_features_cleaned']
     REG_FEATURES_CLEANED = features_info['regression_features_cleaned']
     COLUMN_ALIASES = features_info['column_aliases']
@@ -30,6 +41,10 @@ try:
 
     # Carrega o DataFrame para análise
     df_for_analysis = pd.read_csv('data/predictive_maintenance_cleaned.csv')
+
+    # (NOVO) Resolução de aliases e índices de consulta montados uma única vez
+    column_resolver = ColumnResolver(df_for_analysis.columns, COLUMN_ALIASES)
+    dataset_index = DatasetIndex(df_for_analysis)
     
     print("Serviço de ML: Modelos, XAI e Dados carregados com sucesso.")
 
@@ -37,16 +52,25 @@ except Exception as e:
     print(f"ERRO CRÍTICO ao carregar modelos: {e}")
     print("Certifique-se de executar o script 'train.py' primeiro.")
     model_classifier = None
+    features_info = {}
+    df_for_analysis = None
     # ... (adicionar tratamento de erro, se necessário)
 
+# (NOVO) Estado por máquina ('Product ID') com janelas deslizantes das leituras recebidas
+machine_state = RollingStateStore(window=features_info.get('rolling_window', DEFAULT_WINDOW))
+
 # ===================================================================
 # FERRAMENTAS PARA O GEMINI (Refatoração do Bloco 5)
 # ===================================================================
 
-def run_prediction(type_machine: str, air_temp_k: float, process_temp_k: float, rotation_rpm: float, torque_nm: float, tool_wear_min: float) -> str:
+def run_prediction(type_machine: str, air_temp_k: float, process_temp_k: float, rotation_rpm: float, torque_nm: float, tool_wear_min: float, product_id: str = None) -> str:
     """
     Executa a previsão de falha (classificação) e desgaste (regressão).
     O 'type_machine' deve ser 'L', 'M' ou 'H'.
+    Se 'product_id' for informado, a leitura é acumulada no histórico da máquina e as
+    tendências (média, inclinação e variância em janela) de torque, delta de temperatura
+    e rotação são retornadas junto da previsão (e usadas como features apenas se os
+    modelos foram treinados com elas).
     """
     if not all([model_classifier, model_regressor, le_type]):
          return json.dumps({"error": "Modelos de ML não estão carregados no servidor."})
@@ -57,21 +81,32 @@ def run_prediction(type_machine: str, air_temp_k: float, process_temp_k: float,
         except:
             return json.dumps({"error": f"Tipo de máquina '{type_machine}' inválido. Use 'L', 'M' ou 'H'."})
 
-        # Preparar dados para classificação
-        class_data = [[
-            type_machine_encoded, air_temp_k, process_temp_k,
-            rotation_rpm, torque_nm, tool_wear_min
-        ]]
+        # Features de janela deslizante (O(1) por leitura)
+        signals = extract_signals(air_temp_k, process_temp_k, rotation_rpm, torque_nm)
+        if product_id:
+            rolling_features = machine_state.update(str(product_id), signals)
+        else:
+            rolling_features = single_reading_features(signals)
+
+        row = {
+            'Type': type_machine_encoded,
+            'Air temperature [K]': air_temp_k,
+            'Process temperature [K]': process_temp_k,
+            'Rotational speed [rpm]': rotation_rpm,
+            'Torque [Nm]': torque_nm,
+            'Tool wear [min]': tool_wear_min,
+            **rolling_features
+        }
+
+        # Preparar dados para classificação (na ordem de features do treino)
+        class_data = [[row[name] for name in CLASS_FEATURES]]
         class_data_df = pd.DataFrame(class_data, columns=CLASS_FEATURES_CLEANED)
         
         # Previsão de Classificação
         prob_falha = model_classifier.predict_proba(class_data_df)[0][1]
         
         # Preparar dados para regressão
-        reg_data = [[
-            type_machine_encoded, air_temp_k, process_temp_k,
-            rotation_rpm, torque_nm
-        ]]
+        reg_data = [[row[name] for name in REG_FEATURES]]
         reg_data_df = pd.DataFrame(reg_data, columns=REG_FEATURES_CLEANED)
         
         # Previsão de Regressão
@@ -86,34 +121,44 @@ def run_prediction(type_machine: str, air_temp_k: float, process_temp_k: float,
             "estimated_rul_min": float(rul_estimado),
             "rul_limit_threshold": limite_desgaste
         }
+        if product_id:
+            results["product_id"] = str(product_id)
+            results["rolling_features"] = rolling_features
+
+        # (NOVO) Registra a leitura na janela de drift e indica se está fora da distribuição de treino
+        if drift_monitor.enabled:
+            reading = [[air_temp_k, process_temp_k, rotation_rpm, torque_nm, tool_wear_min]]
+            drift_monitor.observe(reading, [type_machine])
+            results["out_of_distribution"] = drift_monitor.score(reading, [type_machine])[0]
         return json.dumps(results)
         
     except Exception as e:
         return json.dumps({"error": f"Erro durante a previsão: {str(e)}"})
 
-def generate_explanation(model_to_explain: str) -> str:
+def generate_explanation(model_to_explain: str, export_png: bool = False) -> str:
     """
-    Gera um gráfico XAI, salva em disco e retorna um JSON com a URL pública da imagem.
+    Gera o gráfico XAI de importância das features ('classification' ou 'regression').
+    Por padrão retorna os dados do gráfico (chave "chart"), renderizado pelo frontend.
+    Com 'export_png'=True, salva um PNG em disco e retorna a URL pública ("image_url").
     """
     # (MODIFICADO)
+    report_progress(0.2, "Gerando gráfico de importância")
     if model_to_explain.lower() == 'classification':
-        filename = create_feature_importance_plot(
-            importances_dict=importances_classifier,
-            title="Previsão de Falha (Classificação)"
-        )
-        image_url = f"{BACKEND_BASE_URL}/static/{filename}"
-        return json.dumps({"image_url": image_url})
-
+        importances_dict = importances_classifier
+        title = "Previsão de Falha (Classificação)"
     elif model_to_explain.lower() == 'regression':
-        filename = create_feature_importance_plot(
-            importances_dict=importances_regressor,
-            title="Previsão de Desgaste (Regressão)"
-        )
-        image_url = f"{BACKEND_BASE_URL}/static/{filename}"
-        return json.dumps({"image_url": image_url})
+        importances_dict = importances_regressor
+        title = "Previsão de Desgaste (Regressão)"
     else:
         return json.dumps({"error": "Modelo desconhecido. Use 'classification' ou 'regression'."})
 
+    if not export_png:
+        return json.dumps({"chart": compute_feature_importance(importances_dict, title)})
+
+    filename = create_feature_importance_plot(importances_dict=importances_dict, title=title)
+    image_url = f"{BACKEND_BASE_URL}/static/{filename}"
+    return json.dumps({"image_url": image_url})
+
 def get_dataset_summary() -> str:
     """Retorna um sumário estatístico do dataset de manutenção."""
     if df_for_analysis is None:
@@ -133,27 +178,18 @@ def get_dataset_summary() -> str:
     except Exception as e:
         return json.dumps({"error": f"Erro ao gerar sumário: {str(e)}"})
 
-def plot_data_distribution(column_name: str, hue_column: str = None) -> str:
+def plot_data_distribution(column_name: str, hue_column: str = None, export_png: bool = False) -> str:
     """
     Gera um gráfico de distribuição para uma coluna do dataset.
-    Retorna um JSON com o Data URI da imagem em Base64.
+    Por padrão retorna os dados do gráfico (chave "chart"), renderizado pelo frontend.
+    Com 'export_png'=True, salva um PNG em disco e retorna a URL pública ("image_url").
     """
     if df_for_analysis is None:
         return json.dumps({"error": "DataFrame 'df_for_analysis' não foi carregado."})
 
-    # Mapeamento de Sinônimos
-    def get_real_column(name):
-        if not name: return None
-        name_lower = name.lower().strip()
-        if name_lower in COLUMN_ALIASES:
-            return COLUMN_ALIASES[name_lower]
-        # Se não for um alias, verifica se o nome original existe
-        if name in df_for_analysis.columns:
-            return name
-        return None # Nome inválido
-
-    real_column_name = get_real_column(column_name)
-    real_hue_column = get_real_column(hue_column)
+    # Mapeamento de Sinônimos (índice pré-computado)
+    real_column_name = column_resolver.resolve(column_name)
+    real_hue_column = column_resolver.resolve(hue_column)
 
     if not real_column_name:
         return json.dumps({"error": f"Coluna '{column_name}' não encontrada."})
@@ -162,6 +198,11 @@ def plot_data_distribution(column_name: str, hue_column: str = None) -> str:
 
     # (MODIFICADO)
     try:
+        report_progress(0.2, "Gerando gráfico de distribuição")
+        if not export_png:
+            chart = compute_data_distribution(df_for_analysis, real_column_name, real_hue_column)
+            return json.dumps({"chart": chart})
+
         filename = create_data_distribution_plot(df_for_analysis, real_column_name, real_hue_column)
         if not filename:
              raise Exception("Plotting function returned no filename.")
@@ -169,4 +210,25 @@ def plot_data_distribution(column_name: str, hue_column: str = None) -> str:
         image_url = f"{BACKEND_BASE_URL}/static/{filename}"
         return json.dumps({"image_url": image_url})
     except Exception as e:
-        return json.dumps({"error": f"Erro ao gerar gráfico: {str(e)}"})
\ No newline at end of file
+        return json.dumps({"error": f"Erro ao gerar gráfico: {str(e)}"})
+
+def query_dataset(filters: str = "", group_by: str = "", aggregates: str = "count") -> str:
+    """
+    Consulta analítica sobre o dataset de manutenção, em uma única chamada.
+    - 'filters': condições unidas por 'and', ex: "Type == 'H' and Torque [Nm] > 60".
+      Operadores: ==, !=, >, >=, <, <=, in (ex: "Failure Type in ['Power Failure', 'Overstrain Failure']").
+      Colunas de texto (Type, Failure Type) aceitam apenas ==, != e in.
+    - 'group_by': colunas categóricas separadas por vírgula, ex: "Type, Failure Type".
+    - 'aggregates': separados por vírgula, ex: "count, mean(Torque [Nm]), max(Tool wear [min])".
+      Funções: count, sum, mean, min, max, std.
+    Aceita os nomes oficiais das colunas ou seus sinônimos.
+    """
+    if df_for_analysis is None:
+        return json.dumps({"error": "DataFrame 'df_for_analysis' não foi carregado."})
+    try:
+        result = run_query(dataset_index, column_resolver, filters, group_by, aggregates)
+        return json.dumps(result, default=str, ensure_ascii=False)
+    except QueryError as e:
+        return json.dumps({"error": str(e)})
+    except Exception as e:
+        return json.dumps({"error": f"Erro ao executar a consulta: {str(e)}"})
@@ -0,0 +1,215 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from fastapi.staticfiles import StaticFiles
+
+from app.core.config import (
+    STATIC_DIR, ARTIFACT_TTL_S, ARTIFACT_MAX_BYTES, ARTIFACT_MAX_COUNT, ARTIFACT_SWEEP_INTERVAL_S
+)
+
+logger = logging.getLogger(__name__)
+
+# Nomes endereçados por conteúdo: <prefixo>_<hash sha256 (16 hex)>.<ext>
+CONTENT_ADDRESSED_RE = re.compile(r"^[a-z_]+_[0-9a-f]{16}\.[a-z]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+TMP_PREFIX = ".tmp_"
+TMP_STALE_S = 60.0  # Idade mínima para considerar um temporário abandonado
+
+
+class ArtifactStore:
+    """
+    Gerencia as imagens geradas em `directory`: escrita atômica com nome endereçado
+    por conteúdo, índice em memória (tamanho, criação, último acesso) e política de
+    retenção (TTL desde o último acesso, máximo de bytes e de arquivos) aplicada por
+    um varredor em segundo plano.
+    """
+
+    def __init__(self, directory: str, ttl_s: float, max_bytes: int, max_count: int,
+                 sweep_interval_s: float = 300.0):
+        self.directory = directory
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.max_count = max_count
+        self.sweep_interval_s = sweep_interval_s
+        self._index = {}  # nome -> {"size", "created_at", "last_access"}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper = None
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self) -> None:
+        """Reconstrói o índice a partir dos arquivos já existentes no diretório."""
+        with self._lock:
+            self._index.clear()
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.startswith("."):
+                    st = entry.stat()
+                    self._index[entry.name] = {
+                        "size": st.st_size,
+                        "created_at": st.st_mtime,
+                        "last_access": max(st.st_mtime, st.st_atime),
+                    }
+        self._remove_stale_temp_files()
+
+    def _remove_stale_temp_files(self) -> int:
+        """
+        Remove temporários ('.tmp_*') deixados por escritas interrompidas entre o mkstemp
+        e o os.replace. Só apaga os mais antigos que TMP_STALE_S, para não competir com
+        uma escrita em andamento de outro processo que use o mesmo diretório.
+        """
+        now = time.time()
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if not (entry.is_file() and entry.name.startswith(TMP_PREFIX)):
+                continue
+            try:
+                if now - entry.stat().st_mtime > TMP_STALE_S:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Não foi possível remover o temporário '{entry.name}': {e}")
+        if removed:
+            logger.info(f"[ARTIFACTS] {removed} temporário(s) órfão(s) removido(s).")
+        return removed
+
+    # --- Escrita ---
+    def save_bytes(self, data: bytes, prefix: str, extension: str = "png") -> str:
+        """Salva `data` de forma atômica com nome endereçado por conteúdo e retorna o nome."""
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        filename = f"{prefix}_{digest}.{extension}"
+        path = os.path.join(self.directory, filename)
+        now = time.time()
+
+        with self._lock:
+            if filename in self._index and os.path.exists(path):
+                # Mesmo conteúdo já salvo: apenas renova o acesso
+                self._index[filename]["last_access"] = now
+                return filename
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=TMP_PREFIX, suffix=f".{extension}")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._index[filename] = {"size": len(data), "created_at": now, "last_access": now}
+        return filename
+
+    def save_figure(self, fig, prefix: str, **savefig_kwargs) -> str:
+        """Renderiza uma figura do matplotlib em PNG na memória e salva via save_bytes."""
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", **savefig_kwargs)
+        return self.save_bytes(buffer.getvalue(), prefix, "png")
+
+    # --- Índice ---
+    def touch(self, filename: str) -> None:
+        with self._lock:
+            if filename in self._index:
+                self._index[filename]["last_access"] = time.time()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "count": len(self._index),
+                "total_bytes": sum(item["size"] for item in self._index.values()),
+            }
+
+    # --- Retenção ---
+    def sweep(self) -> int:
+        """Aplica a política de retenção e retorna quantos arquivos foram removidos."""
+        now = time.time()
+        with self._lock:
+            # Mais antigos (último acesso) primeiro
+            entries = sorted(self._index.items(), key=lambda kv: kv[1]["last_access"])
+            total_bytes = sum(item["size"] for _, item in entries)
+            count = len(entries)
+            to_remove = []
+            for name, item in entries:
+                expired = self.ttl_s > 0 and now - item["last_access"] > self.ttl_s
+                over_count = self.max_count > 0 and count > self.max_count
+                over_bytes = self.max_bytes > 0 and total_bytes > self.max_bytes
+                if not (expired or over_count or over_bytes):
+                    continue
+                to_remove.append(name)
+                count -= 1
+                total_bytes -= item["size"]
+            # Remove dentro do lock para não competir com um save_bytes do mesmo nome
+            removed = 0
+            for name in to_remove:
+                del self._index[name]
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Não foi possível remover o artefato '{name}': {e}")
+
+        if removed:
+            logger.info(f"[ARTIFACTS] {removed} arquivo(s) removido(s) pela política de retenção.")
+        return removed + self._remove_stale_temp_files()
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval_s):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"[ARTIFACTS] Erro no varredor: {e}", exc_info=True)
+
+    def start_sweeper(self) -> None:
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self.sweep()
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="artifact-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=timeout)
+            self._sweeper = None
+
+
+class ArtifactStaticFiles(StaticFiles):
+    """
+    StaticFiles que registra acessos no ArtifactStore e envia cache de longa duração
+    (immutable) para nomes endereçados por conteúdo. O ETag vem do próprio StaticFiles.
+    """
+
+    def __init__(self, *args, store: ArtifactStore, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        filename = os.path.basename(path)
+        if response.status_code in (200, 304):
+            self.store.touch(filename)
+            if CONTENT_ADDRESSED_RE.match(filename):
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+# --- Instância padrão usada pela aplicação ---
+artifact_store = ArtifactStore(
+    directory=STATIC_DIR,
+    ttl_s=ARTIFACT_TTL_S,
+    max_bytes=ARTIFACT_MAX_BYTES,
+    max_count=ARTIFACT_MAX_COUNT,
+    sweep_interval_s=ARTIFACT_SWEEP_INTERVAL_S
+)
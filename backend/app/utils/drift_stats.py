@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+# Features numéricas monitoradas (nomes originais do dataset)
+DRIFT_FEATURES = [
+    "Air temperature [K]",
+    "Process temperature [K]",
+    "Rotational speed [rpm]",
+    "Torque [Nm]",
+    "Tool wear [min]",
+]
+PSI_BINS = 10
+N_QUANTILES = 101
+PSI_EPS = 1e-4
+
+
+def build_drift_reference(df: pd.DataFrame, features: list = None) -> dict:
+    """
+    Resume a distribuição de treino de forma compacta: por feature, bins de quantis
+    para PSI, um sketch de quantis para KS e estatísticas; por 'Type', média, desvio,
+    mínimo e máximo para o score de anomalia por linha.
+    """
+    features = features or DRIFT_FEATURES
+    probs = np.linspace(0, 1, N_QUANTILES)
+    reference = {"features": features, "n_rows": int(len(df)), "global": {}, "by_type": {}}
+
+    for feature in features:
+        values = df[feature].to_numpy(dtype=np.float64)
+        inner_edges = np.unique(np.quantile(values, np.linspace(0, 1, PSI_BINS + 1)[1:-1]))
+        bin_idx = np.searchsorted(inner_edges, values, side="right")
+        proportions = np.bincount(bin_idx, minlength=len(inner_edges) + 1) / len(values)
+        reference["global"][feature] = {
+            "psi_edges": inner_edges.tolist(),
+            "psi_proportions": proportions.tolist(),
+            "quantiles": np.quantile(values, probs).tolist(),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+        }
+
+    if "Type" in df.columns:
+        grouped = df.groupby("Type")[features]
+        stats = {"mean": grouped.mean(), "std": grouped.std(ddof=0), "min": grouped.min(), "max": grouped.max()}
+        for machine_type in stats["mean"].index:
+            reference["by_type"][str(machine_type)] = {
+                name: [float(v) for v in table.loc[machine_type, features]] for name, table in stats.items()
+            }
+    return reference
+
+
+class ReferenceArrays:
+    """Arrays NumPy pré-montados a partir do artefato de referência (montados uma vez)."""
+
+    def __init__(self, reference: dict):
+        self.features = reference["features"]
+        g = reference["global"]
+        self.psi_edges = [np.asarray(g[f]["psi_edges"]) for f in self.features]
+        self.psi_proportions = [np.asarray(g[f]["psi_proportions"]) for f in self.features]
+        self.quantiles = np.array([g[f]["quantiles"] for f in self.features])  # (n_features, N_QUANTILES)
+        self.probs = np.linspace(0, 1, self.quantiles.shape[1])
+        # CDF de referência para o KS: em quantis empatados (features discretas, ex: 'Tool wear'
+        # começa em [0, 0, ...]) há um salto, com limite à esquerda (menor prob.) e à direita (maior)
+        self.cdf_knots, self.cdf_left, self.cdf_right = [], [], []
+        for q in self.quantiles:
+            knots, first = np.unique(q, return_index=True)
+            last = len(q) - 1 - np.unique(q[::-1], return_index=True)[1]
+            self.cdf_knots.append(knots)
+            self.cdf_left.append(self.probs[first])
+            self.cdf_right.append(self.probs[last])
+
+        self.type_labels = sorted(reference.get("by_type", {}))
+        # Linha extra (última) com as estatísticas globais, usada para tipos desconhecidos
+        rows = {name: [] for name in ("mean", "std", "min", "max")}
+        for label in self.type_labels:
+            for name in rows:
+                rows[name].append(reference["by_type"][label][name])
+        for name in rows:
+            rows[name].append([g[f][name] for f in self.features])
+        self.type_mean = np.array(rows["mean"])
+        self.type_std = np.where(np.array(rows["std"]) > 0, np.array(rows["std"]), 1.0)
+        self.type_min = np.array(rows["min"])
+        self.type_max = np.array(rows["max"])
+
+    def type_codes(self, types) -> np.ndarray:
+        """Converte rótulos de 'Type' em índices das tabelas por tipo (desconhecido -> global)."""
+        lookup = {label: i for i, label in enumerate(self.type_labels)}
+        fallback = len(self.type_labels)
+        return np.array([lookup.get(str(t), fallback) for t in types], dtype=np.int64)
+
+
+def score_rows(ref: ReferenceArrays, X: np.ndarray, type_codes: np.ndarray) -> dict:
+    """
+    Score de anomalia por linha (vetorizado): z-score absoluto máximo em relação ao
+    'Type' da máquina e máscara de features fora da faixa [mín, máx] vista no treino.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    z = np.abs(X - ref.type_mean[type_codes]) / ref.type_std[type_codes]
+    out_of_range = (X < ref.type_min[type_codes]) | (X > ref.type_max[type_codes])
+    return {"max_abs_z": z.max(axis=1), "out_of_range": out_of_range}
+
+
+def population_stability_index(ref: ReferenceArrays, X: np.ndarray) -> np.ndarray:
+    """PSI por feature entre a janela `X` (n x n_features) e os bins de referência."""
+    psi = np.zeros(len(ref.features))
+    for j in range(len(ref.features)):
+        idx = np.searchsorted(ref.psi_edges[j], X[:, j], side="right")
+        actual = np.bincount(idx, minlength=len(ref.psi_proportions[j])) / len(X)
+        expected = np.maximum(ref.psi_proportions[j], PSI_EPS)
+        actual = np.maximum(actual, PSI_EPS)
+        psi[j] = np.sum((actual - expected) * np.log(actual / expected))
+    return psi
+
+
+def ks_statistic(ref: ReferenceArrays, X: np.ndarray) -> np.ndarray:
+    """
+    Estatística KS por feature: distância máxima entre a ECDF da janela e a CDF de
+    referência aproximada por interpolação do sketch de quantis. A ECDF à direita é
+    comparada ao limite à direita da CDF e a ECDF à esquerda ao limite à esquerda, de
+    modo que valores empatados não contam o salto da CDF como distância.
+    """
+    n = len(X)
+    sorted_X = np.sort(X, axis=0)
+    ecdf_hi = np.arange(1, n + 1) / n
+    ecdf_lo = np.arange(0, n) / n
+    ks = np.zeros(len(ref.features))
+    for j in range(len(ref.features)):
+        cdf_right = np.interp(sorted_X[:, j], ref.cdf_knots[j], ref.cdf_right[j], left=0.0, right=1.0)
+        cdf_left = np.interp(sorted_X[:, j], ref.cdf_knots[j], ref.cdf_left[j], left=0.0, right=1.0)
+        ks[j] = max(np.max(ecdf_hi - cdf_right), np.max(cdf_left - ecdf_lo))
+    return ks
+
+
+def psi_severity(psi: float) -> str:
+    if psi < 0.1:
+        return "estável"
+    if psi < 0.25:
+        return "moderado"
+    return "significativo"
@@ -1,19 +1,18 @@
+import threading
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
-import io
-import base64
+import numpy as np
 
-import os
-import uuid
+from app.utils.artifact_store import artifact_store
 
 # Configurações de plotagem
 sns.set_theme(style="whitegrid")
 
-# (NOVO) Define o diretório onde as imagens serão salvas
-STATIC_DIR = "app/static"
-# Garante que o diretório existe (o main.py já faz, mas é bom ter redundância)
-os.makedirs(STATIC_DIR, exist_ok=True)
+# O estado global do pyplot (figura atual) não é thread-safe: os workers da fila de
+# jobs renderizam PNGs em paralelo, então toda renderização passa por este lock.
+_PYPLOT_LOCK = threading.Lock()
 
 def create_feature_importance_plot(importances_dict: dict, title: str) -> str:
     """Gera um gráfico de importância e retorna como Base64 Data URI."""
@@ -24,53 +23,176 @@ def create_feature_importance_plot(importances_dict: dict, title: str) -> str:
     feature_names = [item[0] for item in sorted_features]
     importance_values = [item[1] for item in sorted_features]
     
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x=importance_values, y=feature_names, palette="viridis")
-    plt.title(f'XAI: Importância das Features - {title}', fontsize=16)
-    plt.xlabel('Importância', fontsize=12)
-    plt.ylabel('Feature', fontsize=12)
-    plt.tight_layout()
-    
-    # (NOVO) Gera um nome de arquivo único
-    filename = f"plot_xai_{uuid.uuid4()}.png"
-    save_path = os.path.join(STATIC_DIR, filename)
-    
-    # (MODIFICADO) Salva o gráfico no arquivo
-    plt.savefig(save_path, format='png', bbox_inches='tight', dpi=96) # Mantém o dpi=96!
-    plt.close() # Fecha a figura para liberar memória
+    with _PYPLOT_LOCK:
+        plt.figure(figsize=(10, 6))
+        sns.barplot(x=importance_values, y=feature_names, palette="viridis")
+        plt.title(f'XAI: Importância das Features - {title}', fontsize=16)
+        plt.xlabel('Importância', fontsize=12)
+        plt.ylabel('Feature', fontsize=12)
+        plt.tight_layout()
+
+        # (MODIFICADO) Salva de forma atômica com nome endereçado por conteúdo
+        filename = artifact_store.save_figure(plt.gcf(), prefix="plot_xai", bbox_inches='tight', dpi=96) # Mantém o dpi=96!
+        plt.close() # Fecha a figura para liberar memória
     
     # (MODIFICADO) Retorna apenas o nome do arquivo
     return filename
 
 def create_data_distribution_plot(df: pd.DataFrame, column_name: str, hue_column: str = None) -> str:
     """Gera um gráfico de distribuição e retorna como Base64 Data URI."""
-    try:
-        plt.figure(figsize=(10, 6))
+    with _PYPLOT_LOCK:
+        try:
+            plt.figure(figsize=(10, 6))
 
-        if pd.api.types.is_numeric_dtype(df[column_name]) and df[column_name].nunique() > 20:
-            sns.histplot(data=df, x=column_name, hue=hue_column, kde=True, palette="viridis", multiple="stack" if hue_column else "layer")
-            plt.title(f'Distribuição de {column_name}', fontsize=16)
-            plt.ylabel('Densidade/Contagem', fontsize=12)
-        else:
-            sns.countplot(data=df, x=column_name, hue=hue_column, palette="viridis")
-            plt.title(f'Contagem de {column_name}', fontsize=16)
-            plt.ylabel('Contagem', fontsize=12)
+            if pd.api.types.is_numeric_dtype(df[column_name]) and df[column_name].nunique() > 20:
+                sns.histplot(data=df, x=column_name, hue=hue_column, kde=True, palette="viridis", multiple="stack" if hue_column else "layer")
+                plt.title(f'Distribuição de {column_name}', fontsize=16)
+                plt.ylabel('Densidade/Contagem', fontsize=12)
+            else:
+                sns.countplot(data=df, x=column_name, hue=hue_column, palette="viridis")
+                plt.title(f'Contagem de {column_name}', fontsize=16)
+                plt.ylabel('Contagem', fontsize=12)
 
-        plt.xlabel(column_name, fontsize=12)
-        plt.tight_layout()
-        
-        # (NOVO) Gera um nome de arquivo único
-        filename = f"plot_dist_{uuid.uuid4()}.png"
-        save_path = os.path.join(STATIC_DIR, filename)
+            plt.xlabel(column_name, fontsize=12)
+            plt.tight_layout()
 
-        # (MODIFICADO) Salva o gráfico no arquivo
-        plt.savefig(save_path, format='png', bbox_inches='tight', dpi=96)
-        plt.close() # Fecha a figura para liberar memória
-        
-        # (MODIFICADO) Retorna apenas o nome do arquivo
-        return filename
-        
-    except Exception as e:
-        plt.close()
-        print(f"Erro ao gerar gráfico: {e}")
-        return ""
\ No newline at end of file
+            # (MODIFICADO) Salva de forma atômica com nome endereçado por conteúdo
+            filename = artifact_store.save_figure(plt.gcf(), prefix="plot_dist", bbox_inches='tight', dpi=96)
+            plt.close() # Fecha a figura para liberar memória
+
+            # (MODIFICADO) Retorna apenas o nome do arquivo
+            return filename
+
+        except Exception as e:
+            plt.close()
+            print(f"Erro ao gerar gráfico: {e}")
+            return ""
+
+
+# ===================================================================
+# (NOVO) MODO SOMENTE DADOS: payloads JSON renderizados no frontend
+# ===================================================================
+
+KDE_GRID_POINTS = 100
+KDE_FINE_BINS = 512
+
+# Cache de distribuições já calculadas: (id do DataFrame, coluna, hue) -> payload
+_distribution_cache = {}
+
+
+def _to_list(values: np.ndarray, decimals: int = 6) -> list:
+    return np.round(np.asarray(values, dtype=np.float64), decimals).tolist()
+
+
+def _binned_kde(values: np.ndarray, lo: float, hi: float, grid: np.ndarray) -> np.ndarray:
+    """
+    KDE gaussiana (largura de banda de Scott) sobre um histograma fino dos valores,
+    de modo que o custo no grid independe do número de linhas. Retorna a densidade.
+    """
+    n = values.size
+    if n < 2 or hi <= lo:
+        return np.zeros_like(grid)
+    bandwidth = values.std(ddof=1) * n ** (-1 / 5)
+    if bandwidth <= 0:
+        return np.zeros_like(grid)
+    weights, fine_edges = np.histogram(values, bins=KDE_FINE_BINS, range=(lo, hi))
+    centers = (fine_edges[:-1] + fine_edges[1:]) / 2
+    z = (grid[:, None] - centers[None, :]) / bandwidth
+    kernel = np.exp(-0.5 * z * z) / (bandwidth * np.sqrt(2 * np.pi))
+    return kernel @ weights / n
+
+
+def _group_codes(df: pd.DataFrame, hue_column: str):
+    """Códigos inteiros (ordenados) e rótulos do hue; um único grupo se não houver hue."""
+    if not hue_column:
+        return np.zeros(len(df), dtype=np.int64), [None]
+    codes, labels = pd.factorize(df[hue_column], sort=True)
+    return codes, [str(label) for label in labels]
+
+
+def compute_data_distribution(df: pd.DataFrame, column_name: str, hue_column: str = None) -> dict:
+    """
+    Calcula a distribuição de uma coluna (histograma + KDE ou contagens) como payload JSON.
+    O binning é feito uma vez, com NumPy vetorizado, e o resultado fica em cache por coluna/hue.
+    """
+    cache_key = (id(df), column_name, hue_column)
+    if cache_key in _distribution_cache:
+        return _distribution_cache[cache_key]
+
+    codes, group_labels = _group_codes(df, hue_column)
+    n_groups = len(group_labels)
+    valid = codes >= 0
+    series_names = [label if label is not None else column_name for label in group_labels]
+
+    if pd.api.types.is_numeric_dtype(df[column_name]) and df[column_name].nunique() > 20:
+        values = df[column_name].to_numpy(dtype=np.float64)
+        valid &= ~np.isnan(values)
+        values, codes = values[valid], codes[valid]
+
+        edges = np.histogram_bin_edges(values, bins="auto")
+        n_bins = len(edges) - 1
+        bin_idx = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, n_bins - 1)
+        counts = np.bincount(codes * n_bins + bin_idx, minlength=n_groups * n_bins).reshape(n_groups, n_bins)
+
+        lo, hi = float(edges[0]), float(edges[-1])
+        grid = np.linspace(lo, hi, KDE_GRID_POINTS)
+        bin_width = (hi - lo) / n_bins
+        # Escala a densidade para a mesma unidade das contagens do histograma
+        kdes = np.array([
+            _binned_kde(values[codes == g], lo, hi, grid) * np.count_nonzero(codes == g) * bin_width
+            for g in range(n_groups)
+        ])
+        if hue_column:
+            # Como no seaborn (multiple="stack"): cada curva fica no topo da pilha dos grupos anteriores
+            kdes = np.cumsum(kdes, axis=0)
+        series = [
+            {"name": name, "counts": counts[g].tolist(), "kde": _to_list(kdes[g], 3)}
+            for g, name in enumerate(series_names)
+        ]
+
+        payload = {
+            "type": "histogram",
+            "title": f"Distribuição de {column_name}",
+            "x_label": column_name,
+            "y_label": "Densidade/Contagem",
+            "bin_edges": _to_list(edges),
+            "kde_x": _to_list(grid),
+            "stacked": bool(hue_column),
+            "series": series,
+        }
+    else:
+        cat_codes, categories = pd.factorize(df[column_name], sort=True)
+        valid &= cat_codes >= 0
+        cat_codes, codes = cat_codes[valid], codes[valid]
+        n_cats = len(categories)
+        counts = np.bincount(codes * n_cats + cat_codes, minlength=n_groups * n_cats).reshape(n_groups, n_cats)
+        payload = {
+            "type": "bar",
+            "title": f"Contagem de {column_name}",
+            "x_label": column_name,
+            "y_label": "Contagem",
+            "orientation": "vertical",
+            "categories": [str(c) for c in categories],
+            "series": [{"name": name, "values": counts[g].tolist()} for g, name in enumerate(series_names)],
+        }
+
+    _distribution_cache[cache_key] = payload
+    return payload
+
+
+def compute_feature_importance(importances_dict: dict, title: str) -> dict:
+    """Payload JSON (barras horizontais, ordenadas) da importância das features."""
+    if not importances_dict:
+        return {}
+    names = np.array(list(importances_dict.keys()))
+    values = np.array(list(importances_dict.values()), dtype=np.float64)
+    order = np.argsort(-values, kind="stable")
+    return {
+        "type": "bar",
+        "title": f"XAI: Importância das Features - {title}",
+        "x_label": "Importância",
+        "y_label": "Feature",
+        "orientation": "horizontal",
+        "categories": names[order].tolist(),
+        "series": [{"name": "Importância", "values": _to_list(values[order])}],
+    }
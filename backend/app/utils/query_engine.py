@@ -0,0 +1,374 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Colunas com até este número de valores distintos são tratadas como categóricas
+CATEGORICAL_MAX_UNIQUE = 20
+AGGREGATE_OPS = ("count", "sum", "mean", "min", "max", "std")
+
+_CONDITION_RE = re.compile(r"^\s*(.+?)\s*(==|!=|>=|<=|=|>|<|\bin\b)\s*(.+?)\s*$", re.IGNORECASE)
+_AGGREGATE_RE = re.compile(r"^\s*(\w+)\s*(?:\(\s*(.*?)\s*\))?\s*$")
+_AND_RE = re.compile(r"\s+(?:and|e)\s+", re.IGNORECASE)
+
+
+class QueryError(ValueError):
+    """Erro de validação da consulta (mensagem destinada ao usuário/assistente)."""
+
+
+def normalize_name(name: str) -> str:
+    """Normaliza um nome de coluna/alias: minúsculas, sem acentos, colchetes ou pontuação."""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[\[\]\(\)<>_\-]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class ColumnResolver:
+    """
+    Resolve nomes e sinônimos de colunas com um índice montado uma única vez:
+    alias exato, forma normalizada (sem colchetes, acentos ou '_') e, por último,
+    prefixo normalizado único.
+    """
+
+    def __init__(self, columns: list, aliases: dict):
+        self.columns = list(columns)
+        self._exact = {}
+        self._normalized = {}
+        for column in self.columns:
+            self._exact[column] = column
+            self._exact[column.lower()] = column
+            self._normalized[normalize_name(column)] = column
+        for alias, column in aliases.items():
+            if column in self.columns:
+                self._exact[alias.lower().strip()] = column
+                self._normalized[normalize_name(alias)] = column
+        self._normalized_keys = sorted(self._normalized)
+
+    def resolve(self, name: str):
+        """Retorna o nome oficial da coluna ou None."""
+        if not name:
+            return None
+        stripped = str(name).strip()
+        column = self._exact.get(stripped) or self._exact.get(stripped.lower())
+        if column:
+            return column
+        key = normalize_name(stripped)
+        if key in self._normalized:
+            return self._normalized[key]
+        # Prefixo único (ex: 'process temp' -> 'Process temperature [K]')
+        candidates = {self._normalized[k] for k in self._normalized_keys if k.startswith(key)} if key else set()
+        return candidates.pop() if len(candidates) == 1 else None
+
+
+class DatasetIndex:
+    """
+    Índices pré-computados sobre o dataset para consultas analíticas sem varrer todas
+    as linhas com máscaras do pandas:
+    - colunas numéricas: ordem de classificação (argsort) + valores ordenados,
+      para filtros de faixa por busca binária;
+    - colunas categóricas: códigos inteiros + lista invertida (linhas por código),
+      para igualdade e group-by com bincount.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_rows = len(df)
+        self.values = {}
+        self.sorted_order = {}
+        self.sorted_values = {}
+        self.codes = {}
+        self.categories = {}
+        self.postings = {}
+        for column in df.columns:
+            series = df[column]
+            is_numeric = pd.api.types.is_numeric_dtype(series)
+            if is_numeric:
+                values = series.to_numpy(dtype=np.float64)
+                order = np.argsort(values, kind="stable")
+                self.values[column] = values
+                self.sorted_order[column] = order
+                self.sorted_values[column] = values[order]
+            if not is_numeric or series.nunique() <= CATEGORICAL_MAX_UNIQUE:
+                codes, categories = pd.factorize(series, sort=True)
+                self.codes[column] = codes
+                self.categories[column] = list(categories)
+                order = np.argsort(codes, kind="stable")
+                bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+                self.postings[column] = [order[bounds[i]:bounds[i + 1]] for i in range(len(categories))]
+
+    def is_categorical(self, column: str) -> bool:
+        return column in self.codes
+
+    def category_code(self, column: str, value):
+        """Código do valor categórico (compara como texto, sem diferenciar maiúsculas)."""
+        target = str(value).strip().lower()
+        for code, category in enumerate(self.categories[column]):
+            if str(category).lower() == target:
+                return code
+            if isinstance(category, (int, float, np.number)):
+                try:
+                    if float(category) == float(value):
+                        return code
+                except (TypeError, ValueError):
+                    pass
+        return None
+
+
+# ===================================================================
+# PARSING
+# ===================================================================
+
+def _parse_value(raw: str):
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in "'\"":
+        return raw[1:-1]
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def _coerce_value(index: DatasetIndex, column: str, value):
+    """Em colunas numéricas, converte valores entre aspas ("'0'") para float."""
+    if column not in index.values or not isinstance(value, str):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        raise QueryError(f"Valor '{value}' inválido para a coluna numérica '{column}'.")
+
+
+def parse_filters(filters: str, resolver: ColumnResolver, index: DatasetIndex) -> list:
+    """
+    Converte "Type == 'H' and torque > 60" em [(coluna, operador, valor)].
+    Operadores: ==, !=, >, >=, <, <=, in (lista entre colchetes ou separada por vírgulas);
+    colunas categóricas de texto aceitam apenas ==, != e in, e os operadores de ordem
+    exigem valor numérico.
+    """
+    conditions = []
+    if not filters or not filters.strip():
+        return conditions
+    for part in _AND_RE.split(filters.strip()):
+        match = _CONDITION_RE.match(part)
+        if not match:
+            raise QueryError(f"Condição inválida: '{part}'. Use o formato 'coluna operador valor'.")
+        name, op, raw = match.groups()
+        column = resolver.resolve(name)
+        if column is None:
+            raise QueryError(f"Coluna '{name}' não encontrada.")
+        op = "==" if op == "=" else op.lower()
+        if op == "in":
+            items = raw.strip().strip("[]()")
+            value = [_coerce_value(index, column, _parse_value(item)) for item in items.split(",") if item.strip()]
+        else:
+            value = _coerce_value(index, column, _parse_value(raw))
+        if op in (">", ">=", "<", "<="):
+            if column not in index.values:
+                raise QueryError(f"Operador '{op}' inválido para a coluna categórica '{column}'. Use ==, != ou in.")
+            if not isinstance(value, float):
+                raise QueryError(f"Operador '{op}' exige um valor numérico ('{value}' não é).")
+        conditions.append((column, op, value))
+    return conditions
+
+
+def parse_group_by(group_by: str, resolver: ColumnResolver, index: DatasetIndex) -> list:
+    columns = []
+    for name in [n for n in (group_by or "").split(",") if n.strip()]:
+        column = resolver.resolve(name)
+        if column is None:
+            raise QueryError(f"Coluna '{name.strip()}' não encontrada.")
+        if not index.is_categorical(column):
+            raise QueryError(f"Não é possível agrupar por '{column}' (coluna contínua).")
+        columns.append(column)
+    return columns
+
+
+def parse_aggregates(aggregates: str, resolver: ColumnResolver, index: DatasetIndex) -> list:
+    """Converte "count, mean(torque), max(desgaste)" em [(op, coluna ou None)]."""
+    parsed = []
+    for part in [p for p in (aggregates or "count").split(",") if p.strip()]:
+        match = _AGGREGATE_RE.match(part)
+        if not match or match.group(1).lower() not in AGGREGATE_OPS:
+            raise QueryError(f"Agregação inválida: '{part.strip()}'. Use {', '.join(AGGREGATE_OPS)}.")
+        op, name = match.group(1).lower(), match.group(2)
+        if op == "count" and not name:
+            parsed.append(("count", None))
+            continue
+        column = resolver.resolve(name)
+        if column is None:
+            raise QueryError(f"Coluna '{name}' não encontrada.")
+        if column not in index.values:
+            raise QueryError(f"A agregação '{op}' exige uma coluna numérica ('{column}' não é).")
+        parsed.append((op, column))
+    return parsed
+
+
+# ===================================================================
+# PLANEJAMENTO E EXECUÇÃO
+# ===================================================================
+
+def _index_lookup(index: DatasetIndex, column: str, op: str, value):
+    """
+    Linhas que satisfazem a condição usando só os índices, ou None se a condição
+    não puder dirigir a consulta (ex: '!=' ou valor incompatível).
+    """
+    if index.is_categorical(column) and op in ("==", "in"):
+        values = value if op == "in" else [value]
+        # Códigos únicos: valores repetidos no 'in' não podem duplicar linhas
+        codes = np.unique([c for c in (index.category_code(column, v) for v in values) if c is not None])
+        if not codes.size:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([index.postings[column][c] for c in codes])
+    if column in index.sorted_values and op == "in" and all(isinstance(v, float) for v in value):
+        sorted_values = index.sorted_values[column]
+        slices = [
+            index.sorted_order[column][np.searchsorted(sorted_values, v, side="left"):np.searchsorted(sorted_values, v, side="right")]
+            for v in np.unique(value)
+        ]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+    if column in index.sorted_values and op in ("==", ">", ">=", "<", "<=") and isinstance(value, float):
+        sorted_values = index.sorted_values[column]
+        lo, hi = 0, len(sorted_values)
+        if op in ("==", ">="):
+            lo = np.searchsorted(sorted_values, value, side="left")
+        if op == ">":
+            lo = np.searchsorted(sorted_values, value, side="right")
+        if op in ("==", "<="):
+            hi = np.searchsorted(sorted_values, value, side="right")
+        if op == "<":
+            hi = np.searchsorted(sorted_values, value, side="left")
+        return index.sorted_order[column][lo:max(lo, hi)]
+    return None
+
+
+def _check_rows(index: DatasetIndex, rows: np.ndarray, column: str, op: str, value) -> np.ndarray:
+    """Avalia a condição apenas nas linhas candidatas (vetorizado)."""
+    if index.is_categorical(column) and column not in index.values and op not in ("==", "!=", "in"):
+        raise QueryError(f"Operador '{op}' inválido para a coluna categórica '{column}'. Use ==, != ou in.")
+    if index.is_categorical(column) and (op in ("==", "!=", "in") or not isinstance(value, float)):
+        values = value if op == "in" else [value]
+        codes = [c for c in (index.category_code(column, v) for v in values) if c is not None]
+        keep = np.isin(index.codes[column][rows], codes)
+        return rows[~keep] if op == "!=" else rows[keep]
+    if op == "in" and column in index.values and all(isinstance(v, float) for v in value):
+        return rows[np.isin(index.values[column][rows], value)]
+    if column not in index.values or not isinstance(value, float):
+        raise QueryError(f"Operador '{op}' inválido para '{column}' com valor '{value}'.")
+    column_values = index.values[column][rows]
+    compare = {
+        "==": np.equal, "!=": np.not_equal, ">": np.greater,
+        ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+    }[op]
+    return rows[compare(column_values, value)]
+
+
+def plan_and_filter(index: DatasetIndex, conditions: list):
+    """
+    Planejador simples: avalia cada condição indexável com busca binária/listas
+    invertidas (O(log n) para o tamanho), começa pela mais seletiva e verifica as
+    demais só nas linhas candidatas. Retorna (linhas ordenadas, descrição do plano).
+    """
+    plan = []
+    if not conditions:
+        return np.arange(index.n_rows), ["varredura completa (sem filtros)"]
+
+    lookups = []
+    for position, (column, op, value) in enumerate(conditions):
+        rows = _index_lookup(index, column, op, value)
+        if rows is not None:
+            lookups.append((len(rows), position, rows))
+    if lookups:
+        lookups.sort(key=lambda item: item[0])
+        size, driver_position, rows = lookups[0]
+        column, op, value = conditions[driver_position]
+        plan.append(f"índice: {column} {op} {value} -> {size} linhas")
+    else:
+        driver_position, rows = None, np.arange(index.n_rows)
+        plan.append("varredura completa (nenhuma condição indexável)")
+
+    remaining = [(pos, c) for pos, c in enumerate(conditions) if pos != driver_position]
+    # Demais condições indexadas primeiro (mais seletivas), depois as não indexáveis
+    selectivity = {position: size for size, position, _ in lookups}
+    remaining.sort(key=lambda item: selectivity.get(item[0], index.n_rows + 1))
+    for _, (column, op, value) in remaining:
+        rows = _check_rows(index, rows, column, op, value)
+        plan.append(f"filtro: {column} {op} {value} -> {len(rows)} linhas")
+    return np.sort(rows), plan
+
+
+def _to_python(value):
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else round(float(value), 4)
+    return value
+
+
+def aggregate(index: DatasetIndex, rows: np.ndarray, group_by: list, aggregates: list) -> list:
+    """Agrega as linhas filtradas por grupos usando códigos categóricos e bincount."""
+    if group_by:
+        sizes = [len(index.categories[c]) for c in group_by]
+        keys = np.zeros(len(rows), dtype=np.int64)
+        for column, size in zip(group_by, sizes):
+            keys = keys * size + index.codes[column][rows]
+        n_keys = int(np.prod(sizes))
+    else:
+        sizes, keys, n_keys = [], np.zeros(len(rows), dtype=np.int64), 1
+
+    counts = np.bincount(keys, minlength=n_keys)
+    present = np.flatnonzero(counts) if group_by else np.array([0])
+    results = {"count": counts}
+    for op, column in aggregates:
+        if op == "count":
+            continue
+        values = index.values[column][rows]
+        label = f"{op}({column})"
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if op in ("sum", "mean", "std"):
+                sums = np.bincount(keys, weights=values, minlength=n_keys)
+                if op == "sum":
+                    results[label] = sums
+                else:
+                    means = sums / counts
+                    if op == "mean":
+                        results[label] = means
+                    else:
+                        # Desvio padrão amostral (ddof=1, como no pandas); None com menos de 2 linhas
+                        squares = np.bincount(keys, weights=values * values, minlength=n_keys)
+                        variance = (squares - counts * means * means) / (counts - 1)
+                        results[label] = np.where(counts >= 2, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+            else:
+                fill = np.inf if op == "min" else -np.inf
+                out = np.full(n_keys, fill)
+                (np.minimum if op == "min" else np.maximum).at(out, keys, values)
+                out[counts == 0] = np.nan
+                results[label] = out
+
+    groups = []
+    for key in present:
+        group = {}
+        remainder = int(key)
+        for column, size in reversed(list(zip(group_by, sizes))):
+            remainder, code = divmod(remainder, size)
+            group[column] = _to_python(index.categories[column][code])
+        group = dict(reversed(list(group.items())))
+        for label, array in results.items():
+            group[label] = _to_python(array[key])
+        groups.append(group)
+    return groups
+
+
+def run_query(index: DatasetIndex, resolver: ColumnResolver, filters: str = "",
+              group_by: str = "", aggregates: str = "count") -> dict:
+    """Executa uma consulta completa (filtros -> group-by -> agregações)."""
+    conditions = parse_filters(filters, resolver, index)
+    group_columns = parse_group_by(group_by, resolver, index)
+    aggregate_specs = parse_aggregates(aggregates, resolver, index)
+    rows, plan = plan_and_filter(index, conditions)
+    return {
+        "filters": [f"{c} {op} {v}" for c, op, v in conditions],
+        "group_by": group_columns,
+        "matched_rows": int(len(rows)),
+        "groups": aggregate(index, rows, group_columns, aggregate_specs),
+        "plan": plan,
+    }
@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Sinais acompanhados por máquina: (prefixo da feature, coluna de origem).
+# 'temp_delta' é derivado: Process temperature [K] - Air temperature [K].
+ROLLING_SIGNALS = [
+    ("torque", "Torque [Nm]"),
+    ("temp_delta", None),
+    ("rpm", "Rotational speed [rpm]"),
+]
+ROLLING_STATS = ["mean", "slope", "var"]
+ROLLING_FEATURES = [f"{prefix}_roll_{stat}" for prefix, _ in ROLLING_SIGNALS for stat in ROLLING_STATS]
+DEFAULT_WINDOW = 10
+
+
+def extract_signals(air_temp_k: float, process_temp_k: float, rotation_rpm: float, torque_nm: float) -> np.ndarray:
+    """Monta o vetor de sinais (na ordem de ROLLING_SIGNALS) a partir de uma leitura."""
+    return np.array([torque_nm, process_temp_k - air_temp_k, rotation_rpm], dtype=np.float32)
+
+
+class MachineState:
+    """
+    Janela deslizante de tamanho fixo para uma máquina.
+    As leituras ficam em um ring buffer float32 (window x n_sinais) e as somas
+    (Σy, Σy², Σx·y, com x = posição na janela) são atualizadas em O(1) por leitura,
+    independentemente do tamanho da janela.
+    """
+
+    __slots__ = ("window", "buffer", "head", "count", "sum_y", "sum_yy", "sum_xy", "_since_resync")
+
+    def __init__(self, window: int, n_signals: int):
+        self.window = window
+        self.buffer = np.zeros((window, n_signals), dtype=np.float32)
+        self.head = 0  # posição do valor mais antigo no buffer
+        self.count = 0
+        self.sum_y = np.zeros(n_signals, dtype=np.float64)
+        self.sum_yy = np.zeros(n_signals, dtype=np.float64)
+        self.sum_xy = np.zeros(n_signals, dtype=np.float64)
+        self._since_resync = 0
+
+    def push(self, values: np.ndarray) -> None:
+        y = np.asarray(values, dtype=np.float32)
+        y64 = y.astype(np.float64)
+        if self.count < self.window:
+            # Janela ainda crescendo: o novo valor entra na posição x = count
+            self.buffer[(self.head + self.count) % self.window] = y
+            self.sum_xy += self.count * y64
+            self.count += 1
+        else:
+            # Janela cheia: remove o mais antigo (x=0), desloca x -> x-1 e insere em x = window-1
+            oldest = self.buffer[self.head].astype(np.float64)
+            self.sum_xy -= self.sum_y - oldest
+            self.sum_y -= oldest
+            self.sum_yy -= oldest * oldest
+            self.buffer[self.head] = y
+            self.head = (self.head + 1) % self.window
+            self.sum_xy += (self.window - 1) * y64
+            self._since_resync += 1
+        self.sum_y += y64
+        self.sum_yy += y64 * y64
+
+        # Recalcula as somas a partir do buffer a cada `window` remoções para
+        # conter o erro acumulado de ponto flutuante (custo amortizado O(1))
+        if self._since_resync >= self.window:
+            self._resync()
+
+    def _resync(self) -> None:
+        ordered = np.roll(self.buffer, -self.head, axis=0)[:self.count].astype(np.float64)
+        x = np.arange(self.count, dtype=np.float64)
+        self.sum_y = ordered.sum(axis=0)
+        self.sum_yy = (ordered * ordered).sum(axis=0)
+        self.sum_xy = x @ ordered
+        self._since_resync = 0
+
+    def stats(self) -> np.ndarray:
+        """Retorna matriz (n_sinais x 3) com média, inclinação (por leitura) e variância."""
+        n = self.count
+        out = np.zeros((self.buffer.shape[1], len(ROLLING_STATS)), dtype=np.float64)
+        if n == 0:
+            return out
+        mean = self.sum_y / n
+        out[:, 0] = mean
+        if n > 1:
+            sum_x = n * (n - 1) / 2.0
+            denom = n * n * (n * n - 1) / 12.0  # n·Σx² - (Σx)² para x = 0..n-1
+            out[:, 1] = (n * self.sum_xy - sum_x * self.sum_y) / denom
+        out[:, 2] = np.maximum(self.sum_yy / n - mean * mean, 0.0)
+        return out
+
+    def features(self) -> dict:
+        return dict(zip(ROLLING_FEATURES, self.stats().ravel().tolist()))
+
+
+class RollingStateStore:
+    """
+    Estado em memória por máquina (chave: 'Product ID').
+    Cada máquina ocupa memória fixa; acima de `max_machines` a menos recente é descartada (LRU).
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, max_machines: int = 10000):
+        self.window = max(1, int(window))
+        self.max_machines = max_machines
+        self._states: "OrderedDict[str, MachineState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, machine_id: str, signals: np.ndarray) -> dict:
+        """Registra uma leitura da máquina e retorna as features de janela atualizadas."""
+        with self._lock:
+            state = self._states.get(machine_id)
+            if state is None:
+                state = MachineState(self.window, len(ROLLING_SIGNALS))
+                self._states[machine_id] = state
+                if len(self._states) > self.max_machines:
+                    self._states.popitem(last=False)
+            else:
+                self._states.move_to_end(machine_id)
+            state.push(signals)
+            return state.features()
+
+    def get_features(self, machine_id: str) -> dict:
+        with self._lock:
+            state = self._states.get(machine_id)
+            return state.features() if state else None
+
+    def __len__(self):
+        return len(self._states)
+
+
+def single_reading_features(signals: np.ndarray) -> dict:
+    """Features de janela para uma leitura isolada (sem histórico da máquina)."""
+    state = MachineState(1, len(ROLLING_SIGNALS))
+    state.push(signals)
+    return state.features()
+
+
+def compute_rolling_features(df, id_column: str = "Product ID", window: int = DEFAULT_WINDOW):
+    """
+    Reproduz as leituras do DataFrame (na ordem das linhas) pelo mesmo RollingStateStore
+    usado no backend e retorna um DataFrame com ROLLING_FEATURES alinhado ao índice de `df`.
+    """
+    store = RollingStateStore(window=window, max_machines=len(df) + 1)
+    signals = np.column_stack([
+        df["Torque [Nm]"].to_numpy(dtype=np.float32),
+        (df["Process temperature [K]"] - df["Air temperature [K]"]).to_numpy(dtype=np.float32),
+        df["Rotational speed [rpm]"].to_numpy(dtype=np.float32),
+    ])
+    rows = np.empty((len(df), len(ROLLING_FEATURES)), dtype=np.float64)
+    for i, machine_id in enumerate(df[id_column].astype(str).to_numpy()):
+        rows[i] = list(store.update(machine_id, signals[i]).values())
+    return pd.DataFrame(rows, columns=ROLLING_FEATURES, index=df.index)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Teste de carga offline do /chat com o backend de LLM de replay (sem rede e sem cota do Gemini).
+
+Uso (a partir da pasta backend/):
+    python loadtest.py --users 20 --requests 10 --latency 0.5 --jitter 0.2
+
+Simula N usuários concorrentes enviando as mensagens das conversas gravadas em
+REPLAY_FILE e reporta latência (p50/p95/p99), vazão, erros (status != 200 ou flag
+'error' da resposta) e o tempo gasto no modelo, na espera por uma thread do modelo e
+nas ferramentas. Com --url, dispara contra um servidor já em execução.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+import httpx
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Teste de carga do /chat com LLM de replay.")
+    parser.add_argument("--users", type=int, default=10, help="Usuários simulados concorrentes")
+    parser.add_argument("--requests", type=int, default=5, help="Requisições por usuário")
+    parser.add_argument("--latency", type=float, default=0.5, help="Latência simulada por chamada ao modelo (s)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Variação máxima adicional da latência (s)")
+    parser.add_argument("--replay-file", default="data/replay_conversations.json", help="Conversas gravadas")
+    parser.add_argument("--url", default=None, help="URL de um servidor em execução (padrão: app em processo)")
+    return parser.parse_args()
+
+
+async def simulated_user(client, user_id: int, messages: list, n_requests: int, samples: list):
+    for i in range(n_requests):
+        message = messages[(user_id + i) % len(messages)]
+        start = time.perf_counter()
+        response = await client.post("/chat", json={"message": message, "history": []}, timeout=120)
+        elapsed = time.perf_counter() - start
+        body = response.json() if response.status_code == 200 else {}
+        timings = body.get("timings", {})
+        samples.append({
+            "latency_s": elapsed,
+            # O /chat responde 200 com a mensagem de erro em 'reply': conta também a flag 'error'
+            "ok": response.status_code == 200 and not body.get("error", False),
+            "model_s": timings.get("model_s", 0.0),
+            "model_queue_s": timings.get("model_queue_s", 0.0),
+            "tools_s": timings.get("tools_s", 0.0),
+            "tool_calls": timings.get("tool_calls", 0),
+        })
+
+
+def report(samples: list, wall_s: float, users: int) -> dict:
+    latencies = np.array([s["latency_s"] for s in samples])
+    model_s = sum(s["model_s"] for s in samples)
+    model_queue_s = sum(s["model_queue_s"] for s in samples)
+    tools_s = sum(s["tools_s"] for s in samples)
+    total_s = latencies.sum()
+    return {
+        "users": users,
+        "requests": len(samples),
+        "errors": sum(not s["ok"] for s in samples),
+        "wall_time_s": round(wall_s, 3),
+        "throughput_rps": round(len(samples) / wall_s, 3) if wall_s else 0.0,
+        "latency_s": {
+            "p50": round(float(np.percentile(latencies, 50)), 4),
+            "p95": round(float(np.percentile(latencies, 95)), 4),
+            "p99": round(float(np.percentile(latencies, 99)), 4),
+            "max": round(float(latencies.max()), 4),
+        },
+        "time_in_model_s": round(model_s, 3),
+        "time_waiting_model_thread_s": round(model_queue_s, 3),
+        "time_in_tools_s": round(tools_s, 3),
+        "time_other_s": round(max(0.0, total_s - model_s - model_queue_s - tools_s), 3),
+        "tool_calls": int(sum(s["tool_calls"] for s in samples)),
+    }
+
+
+async def main():
+    args = parse_args()
+    with open(args.replay_file, "r", encoding="utf-8") as f:
+        messages = [conversation["user"] for conversation in json.load(f)]
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url)
+    else:
+        # Configura o backend de replay ANTES de importar a aplicação
+        os.environ["LLM_BACKEND"] = "replay"
+        os.environ["REPLAY_FILE"] = args.replay_file
+        os.environ["REPLAY_LATENCY_S"] = str(args.latency)
+        os.environ["REPLAY_JITTER_S"] = str(args.jitter)
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest")
+
+    samples = []
+    async with client:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            simulated_user(client, user_id, messages, args.requests, samples)
+            for user_id in range(args.users)
+        ])
+        wall_s = time.perf_counter() - start
+
+    print(json.dumps(report(samples, wall_s, args.users), indent=4, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Permite 'import app...' ao rodar o pytest a partir da pasta backend/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# A instância padrão do job_service abre o SQLite na importação: mantém-no fora da árvore
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="jobs_test_"), "jobs.sqlite3"))
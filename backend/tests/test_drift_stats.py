@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.drift_stats import (
+    DRIFT_FEATURES, N_QUANTILES, ReferenceArrays, build_drift_reference,
+    ks_statistic, population_stability_index, psi_severity, score_rows,
+)
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TORQUE = DRIFT_FEATURES.index("Torque [Nm]")
+TOOL_WEAR = DRIFT_FEATURES.index("Tool wear [min]")
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pd.read_csv(os.path.join(BACKEND_DIR, "data", "predictive_maintenance_cleaned.csv"))
+
+
+@pytest.fixture(scope="module")
+def ref(df):
+    return ReferenceArrays(build_drift_reference(df))
+
+
+def test_training_data_against_itself_has_no_drift(ref, df):
+    X = df[DRIFT_FEATURES].to_numpy(dtype=np.float64)
+    # Mesmos bins (searchsorted side="right") no artefato e no PSI: proporções idênticas
+    assert population_stability_index(ref, X) == pytest.approx(0.0, abs=1e-9)
+    # KS limitado pela resolução do sketch de quantis, inclusive com empates ('Tool wear' começa em 0, 0, ...)
+    assert ref.quantiles[TOOL_WEAR][0] == ref.quantiles[TOOL_WEAR][1]
+    assert ks_statistic(ref, X).max() <= 1.0 / (N_QUANTILES - 1)
+
+
+def test_sample_from_training_data_is_stable(ref, df):
+    X = df.sample(2000, random_state=0)[DRIFT_FEATURES].to_numpy(dtype=np.float64)
+    psi = population_stability_index(ref, X)
+    assert psi.max() < 0.02
+    assert all(psi_severity(value) == "estável" for value in psi)
+    assert ks_statistic(ref, X).max() < 0.05
+
+
+def test_shifted_sample_is_significant_drift(ref, df):
+    X = df.sample(2000, random_state=0)[DRIFT_FEATURES].to_numpy(dtype=np.float64)
+    X[:, TORQUE] += 10.0
+    psi = population_stability_index(ref, X)
+    ks = ks_statistic(ref, X)
+    assert psi[TORQUE] > 0.25 and psi_severity(psi[TORQUE]) == "significativo"
+    assert ks[TORQUE] > 0.3
+    others = np.arange(len(DRIFT_FEATURES)) != TORQUE
+    assert psi[others].max() < 0.1
+
+
+def test_score_rows_flags_values_outside_type_range(ref, df):
+    codes = ref.type_codes(["L", "L", "H", "desconhecido"])
+    low_torque = df.loc[df["Type"] == "L", "Torque [Nm]"].min()
+    typical = df.loc[df["Type"] == "L", DRIFT_FEATURES].median().to_numpy(dtype=np.float64)
+    outlier = typical.copy()
+    outlier[TORQUE] = low_torque - 1.0
+    X = np.vstack([typical, outlier, typical, typical])
+
+    scores = score_rows(ref, X, codes)
+    assert codes[-1] == len(ref.type_labels)  # tipo desconhecido -> estatísticas globais
+    assert not scores["out_of_range"][0].any()
+    assert scores["out_of_range"][1].tolist() == [i == TORQUE for i in range(len(DRIFT_FEATURES))]
+    assert scores["max_abs_z"][1] > scores["max_abs_z"][0]
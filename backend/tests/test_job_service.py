@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app.services.job_service import (
+    JobManager, MemoryJobStore, SQLiteJobStore, make_dedupe_key, QUEUED, RUNNING, DONE, FAILED
+)
+
+
+def wait_final(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    job = manager.get(job_id)
+    while job["status"] not in (DONE, FAILED) and time.monotonic() < deadline:
+        time.sleep(0.01)
+        job = manager.get(job_id)
+    return job
+
+
+@pytest.fixture
+def managers():
+    created = []
+
+    def make(store=None, **kwargs):
+        manager = JobManager(store or MemoryJobStore(), **kwargs)
+        created.append(manager)
+        return manager
+
+    yield make
+    for manager in created:
+        manager.stop()
+
+
+def test_active_job_is_reused(managers):
+    release = threading.Event()
+    manager = managers()
+    manager.register_tool("slow", lambda n: release.wait(5) and json.dumps({"n": n}))
+
+    first = manager.submit("slow", {"n": 1})
+    assert manager.submit("slow", {"n": 1})["id"] == first["id"]
+    assert manager.submit("slow", {"n": 2})["id"] != first["id"]
+    release.set()
+    assert wait_final(manager, first["id"])["status"] == DONE
+
+
+def test_recently_finished_job_is_reused_within_ttl(managers):
+    calls = []
+    manager = managers(result_ttl_s=60)
+    manager.register_tool("fast", lambda: calls.append(1) or "{}")
+
+    first = manager.submit("fast")
+    assert wait_final(manager, first["id"])["status"] == DONE
+    assert manager.submit("fast")["id"] == first["id"]
+    assert len(calls) == 1
+
+
+def test_finished_job_is_not_reused_after_ttl(managers):
+    manager = managers(result_ttl_s=0)
+    manager.register_tool("fast", lambda: "{}")
+
+    first = manager.submit("fast")
+    wait_final(manager, first["id"])
+    time.sleep(0.01)
+    assert manager.submit("fast")["id"] != first["id"]
+
+
+def test_failed_job_is_not_reused(managers):
+    manager = managers(result_ttl_s=60)
+
+    def broken():
+        raise RuntimeError("falhou")
+
+    manager.register_tool("broken", broken)
+    first = manager.submit("broken")
+    job = wait_final(manager, first["id"])
+    assert job["status"] == FAILED and "falhou" in job["error"]
+    assert manager.submit("broken")["id"] != first["id"]
+
+
+def test_lower_priority_value_runs_first(managers):
+    release = threading.Event()
+    order = []
+    manager = managers(max_workers=1)
+    manager.register_tool("block", lambda: release.wait(5) and "{}")
+    manager.register_tool("record", lambda tag: order.append(tag) or "{}")
+
+    blocker = manager.submit("block")
+    jobs = [manager.submit("record", {"tag": tag}, priority=priority)
+            for tag, priority in (("c", 30), ("a", 1), ("b", 10))]
+    release.set()
+    for job in [blocker] + jobs:
+        wait_final(manager, job["id"])
+    assert order == ["a", "b", "c"]
+
+
+def _pending_job(job_id, tool, args, status):
+    return {
+        "id": job_id, "dedupe_key": make_dedupe_key(tool, args), "tool": tool, "args": args,
+        "priority": 10, "status": status, "progress": 0.5 if status == RUNNING else 0.0,
+        "message": None, "result": None, "error": None, "created_at": time.time(),
+        "started_at": time.time() if status == RUNNING else None, "finished_at": None,
+    }
+
+
+def test_pending_jobs_are_resumed_after_restart(managers, tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    previous = SQLiteJobStore(db_path)
+    previous.insert(_pending_job("queued-job", "echo", {"x": 1}, QUEUED))
+    previous.insert(_pending_job("running-job", "echo", {"x": 2}, RUNNING))
+    previous.insert(_pending_job("orphan-job", "removed_tool", {}, QUEUED))
+
+    manager = managers(SQLiteJobStore(db_path))
+    manager.register_tool("echo", lambda x: json.dumps({"x": x}))
+    manager.start()
+
+    for job_id, x in (("queued-job", 1), ("running-job", 2)):
+        job = wait_final(manager, job_id)
+        assert job["status"] == DONE and json.loads(job["result"]) == {"x": x}
+    orphan = manager.get("orphan-job")
+    assert orphan["status"] == FAILED and "removed_tool" in orphan["error"]
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_prune_removes_only_old_finished_jobs(managers, tmp_path, kind):
+    store = MemoryJobStore() if kind == "memory" else SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    now = time.time()
+    for job_id, status, finished_at in (("old-done", DONE, now - 7200), ("old-failed", FAILED, now - 7200),
+                                        ("new-done", DONE, now), ("queued", QUEUED, None)):
+        store.insert(dict(_pending_job(job_id, "echo", {"id": job_id}, status), finished_at=finished_at))
+
+    manager = managers(store, result_ttl_s=60, retention_s=3600)
+    assert manager.prune() == 2
+    assert [j for j in ("old-done", "old-failed", "new-done", "queued") if store.get(j)] == ["new-done", "queued"]
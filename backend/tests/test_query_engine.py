@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.query_engine import ColumnResolver, DatasetIndex, QueryError, run_query
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pd.read_csv(os.path.join(BACKEND_DIR, "data", "predictive_maintenance_cleaned.csv"))
+
+
+@pytest.fixture(scope="module")
+def engine(df):
+    with open(os.path.join(BACKEND_DIR, "models", "features_info.json"), "r", encoding="utf-8") as f:
+        aliases = json.load(f)["column_aliases"]
+    return DatasetIndex(df), ColumnResolver(df.columns, aliases)
+
+
+def query(engine, filters="", group_by="", aggregates="count"):
+    index, resolver = engine
+    return run_query(index, resolver, filters, group_by, aggregates)
+
+
+def test_filters_and_group_by_match_pandas(engine, df):
+    result = query(
+        engine, "Type == 'H' and torque > 60", "Failure Type",
+        "count, mean(Torque [Nm]), std(Torque [Nm]), min(desgaste), max(desgaste)",
+    )
+    subset = df[(df["Type"] == "H") & (df["Torque [Nm]"] > 60)]
+    expected = subset.groupby("Failure Type").agg(
+        count=("Torque [Nm]", "size"),
+        mean=("Torque [Nm]", "mean"),
+        std=("Torque [Nm]", "std"),
+        min=("Tool wear [min]", "min"),
+        max=("Tool wear [min]", "max"),
+    )
+    assert result["matched_rows"] == len(subset)
+    assert [g["Failure Type"] for g in result["groups"]] == list(expected.index)
+    for group in result["groups"]:
+        row = expected.loc[group["Failure Type"]]
+        assert group["count"] == row["count"]
+        assert group["mean(Torque [Nm])"] == pytest.approx(row["mean"], abs=1e-4)
+        assert group["min(Tool wear [min])"] == row["min"]
+        assert group["max(Tool wear [min])"] == row["max"]
+        if np.isnan(row["std"]):
+            assert group["std(Torque [Nm])"] is None
+        else:
+            assert group["std(Torque [Nm])"] == pytest.approx(row["std"], abs=1e-4)
+
+
+def test_std_is_sample_std_and_none_for_single_row(engine, df):
+    result = query(engine, "Target == 1", "Type, Failure Type", "count, std(Air temperature [K])")
+    expected = df[df["Target"] == 1].groupby(["Type", "Failure Type"])["Air temperature [K]"].std()
+    assert any(g["count"] == 1 for g in result["groups"])
+    for group in result["groups"]:
+        value = expected.loc[(group["Type"], group["Failure Type"])]
+        if group["count"] < 2:
+            assert np.isnan(value) and group["std(Air temperature [K])"] is None
+        else:
+            assert group["std(Air temperature [K])"] == pytest.approx(value, abs=1e-4)
+
+
+@pytest.mark.parametrize("filters, mask", [
+    ("Target in [1, 1]", lambda d: d["Target"] == 1),
+    ("Type in ['H', 'H', 'L']", lambda d: d["Type"].isin(["H", "L"])),
+    ("Rotational speed [rpm] in [1500, 1500, 1600]", lambda d: d["Rotational speed [rpm]"].isin([1500, 1600])),
+])
+def test_in_with_duplicate_values_does_not_duplicate_rows(engine, df, filters, mask):
+    assert query(engine, filters)["matched_rows"] == int(mask(df).sum())
+
+
+@pytest.mark.parametrize("filters", ["Type > 'H'", "Failure Type <= 'No Failure'", "Type >= 1"])
+def test_ordering_operator_on_text_categorical_is_rejected(engine, filters):
+    with pytest.raises(QueryError):
+        query(engine, filters)
+
+
+def test_ordering_operator_on_numeric_categorical_is_allowed(engine, df):
+    assert query(engine, "Target >= 1")["matched_rows"] == int((df["Target"] >= 1).sum())
+
+
+@pytest.mark.parametrize("filters, mask", [
+    ("Target > '0'", lambda d: d["Target"] > 0),
+    ("Target == \"1\"", lambda d: d["Target"] == 1),
+    ("torque <= '40'", lambda d: d["Torque [Nm]"] <= 40),
+    ("Target in ['1', '1']", lambda d: d["Target"] == 1),
+])
+def test_quoted_numbers_on_numeric_columns_are_compared_as_numbers(engine, df, filters, mask):
+    assert query(engine, filters)["matched_rows"] == int(mask(df).sum())
+
+
+@pytest.mark.parametrize("filters", ["Target > 'abc'", "torque >= 'alto'", "Target == 'sim'"])
+def test_non_numeric_value_on_numeric_column_is_rejected(engine, filters):
+    with pytest.raises(QueryError):
+        query(engine, filters)
@@ -0,0 +1,193 @@
+'use client';
+
+// Renderiza no cliente (SVG) os payloads de gráfico retornados pelo backend em `charts`.
+
+export interface HistogramSeries {
+  name: string;
+  counts: number[];
+  kde: number[]; // Com `stacked`, já acumulada sobre as séries anteriores (como as barras)
+}
+
+export interface HistogramChart {
+  type: 'histogram';
+  title: string;
+  x_label: string;
+  y_label: string;
+  bin_edges: number[];
+  kde_x: number[];
+  stacked: boolean;
+  series: HistogramSeries[];
+}
+
+export interface BarSeries {
+  name: string;
+  values: number[];
+}
+
+export interface BarChart {
+  type: 'bar';
+  title: string;
+  x_label: string;
+  y_label: string;
+  orientation: 'vertical' | 'horizontal';
+  categories: string[];
+  series: BarSeries[];
+}
+
+export type ChartPayload = HistogramChart | BarChart;
+
+// Paleta próxima da "viridis" usada nos gráficos PNG
+const PALETTE = ['#440154', '#3b528b', '#21918c', '#5ec962', '#fde725', '#31688e', '#35b779'];
+
+const WIDTH = 600;
+const HEIGHT = 320;
+const MARGIN = { top: 16, right: 16, bottom: 48, left: 64 };
+const PLOT_W = WIDTH - MARGIN.left - MARGIN.right;
+const PLOT_H = HEIGHT - MARGIN.top - MARGIN.bottom;
+
+function formatTick(value: number): string {
+  if (Math.abs(value) >= 1000) return value.toFixed(0);
+  if (Math.abs(value) >= 10) return value.toFixed(1);
+  return value.toFixed(2);
+}
+
+function ticks(min: number, max: number, count = 5): number[] {
+  if (max <= min) return [min];
+  const step = (max - min) / (count - 1);
+  return Array.from({ length: count }, (_, i) => min + i * step);
+}
+
+function Legend({ names }: { names: string[] }) {
+  if (names.length < 2) return null;
+  return (
+    <div className="flex flex-wrap gap-3 mt-2 text-xs text-slate-600">
+      {names.map((name, i) => (
+        <span key={name} className="flex items-center gap-1">
+          <span className="inline-block w-3 h-3 rounded-sm" style={{ background: PALETTE[i % PALETTE.length] }} />
+          {name}
+        </span>
+      ))}
+    </div>
+  );
+}
+
+function Histogram({ chart }: { chart: HistogramChart }) {
+  const edges = chart.bin_edges;
+  const nBins = edges.length - 1;
+  const xMin = edges[0];
+  const xMax = edges[nBins];
+  const sx = (x: number) => MARGIN.left + ((x - xMin) / (xMax - xMin || 1)) * PLOT_W;
+
+  // Alturas acumuladas (empilhado) ou sobrepostas (camadas)
+  const stackedTops = chart.series.map((_, s) =>
+    Array.from({ length: nBins }, (_, b) =>
+      chart.stacked
+        ? chart.series.slice(0, s + 1).reduce((acc, ser) => acc + ser.counts[b], 0)
+        : chart.series[s].counts[b]
+    )
+  );
+  const yMax = Math.max(
+    1,
+    ...stackedTops.flat(),
+    ...chart.series.flatMap((ser) => ser.kde)
+  );
+  const sy = (y: number) => MARGIN.top + PLOT_H - (y / yMax) * PLOT_H;
+
+  return (
+    <svg viewBox={`0 0 ${WIDTH} ${HEIGHT}`} className="w-full h-auto">
+      {ticks(0, yMax).map((t) => (
+        <g key={`y${t}`}>
+          <line x1={MARGIN.left} x2={WIDTH - MARGIN.right} y1={sy(t)} y2={sy(t)} stroke="#e2e8f0" />
+          <text x={MARGIN.left - 6} y={sy(t) + 4} textAnchor="end" fontSize="10" fill="#64748b">{formatTick(t)}</text>
+        </g>
+      ))}
+      {chart.series.map((ser, s) =>
+        ser.counts.map((_, b) => {
+          const top = stackedTops[s][b];
+          const bottom = chart.stacked && s > 0 ? stackedTops[s - 1][b] : 0;
+          return (
+            <rect
+              key={`${s}-${b}`}
+              x={sx(edges[b])}
+              y={sy(top)}
+              width={Math.max(0, sx(edges[b + 1]) - sx(edges[b]) - 0.5)}
+              height={Math.max(0, sy(bottom) - sy(top))}
+              fill={PALETTE[s % PALETTE.length]}
+              fillOpacity={chart.stacked ? 0.75 : 0.5}
+            />
+          );
+        })
+      )}
+      {chart.series.map((ser, s) => (
+        <polyline
+          key={`kde${s}`}
+          fill="none"
+          stroke={PALETTE[s % PALETTE.length]}
+          strokeWidth={2}
+          points={ser.kde.map((y, i) => `${sx(chart.kde_x[i])},${sy(y)}`).join(' ')}
+        />
+      ))}
+      {ticks(xMin, xMax).map((t) => (
+        <text key={`x${t}`} x={sx(t)} y={HEIGHT - MARGIN.bottom + 16} textAnchor="middle" fontSize="10" fill="#64748b">{formatTick(t)}</text>
+      ))}
+      <text x={MARGIN.left + PLOT_W / 2} y={HEIGHT - 8} textAnchor="middle" fontSize="12" fill="#334155">{chart.x_label}</text>
+      <text transform={`translate(14 ${MARGIN.top + PLOT_H / 2}) rotate(-90)`} textAnchor="middle" fontSize="12" fill="#334155">{chart.y_label}</text>
+    </svg>
+  );
+}
+
+function Bars({ chart }: { chart: BarChart }) {
+  const nCats = chart.categories.length;
+  const nSeries = chart.series.length;
+  const vMax = Math.max(1e-9, ...chart.series.flatMap((ser) => ser.values));
+  const horizontal = chart.orientation === 'horizontal';
+  const left = horizontal ? 160 : MARGIN.left;
+  const plotW = WIDTH - left - MARGIN.right;
+  const band = (horizontal ? PLOT_H : plotW) / Math.max(1, nCats);
+  const barSize = (band * 0.8) / nSeries;
+  const scale = (v: number) => (v / vMax) * (horizontal ? plotW : PLOT_H);
+
+  return (
+    <svg viewBox={`0 0 ${WIDTH} ${HEIGHT}`} className="w-full h-auto">
+      {chart.categories.map((cat, c) => (
+        <g key={cat}>
+          {chart.series.map((ser, s) => {
+            const offset = c * band + band * 0.1 + s * barSize;
+            const size = scale(ser.values[c]);
+            return horizontal ? (
+              <rect key={s} x={left} y={MARGIN.top + offset} width={size} height={barSize} fill={PALETTE[(nSeries > 1 ? s : c) % PALETTE.length]} />
+            ) : (
+              <rect key={s} x={left + offset} y={MARGIN.top + PLOT_H - size} width={barSize} height={size} fill={PALETTE[(nSeries > 1 ? s : c) % PALETTE.length]} />
+            );
+          })}
+          {horizontal ? (
+            <text x={left - 6} y={MARGIN.top + c * band + band / 2 + 4} textAnchor="end" fontSize="10" fill="#334155">{cat}</text>
+          ) : (
+            <text x={left + c * band + band / 2} y={HEIGHT - MARGIN.bottom + 16} textAnchor="middle" fontSize="10" fill="#334155">{cat}</text>
+          )}
+        </g>
+      ))}
+      {ticks(0, vMax).map((t) =>
+        horizontal ? (
+          <text key={t} x={left + scale(t)} y={HEIGHT - MARGIN.bottom + 16} textAnchor="middle" fontSize="10" fill="#64748b">{formatTick(t)}</text>
+        ) : (
+          <text key={t} x={left - 6} y={MARGIN.top + PLOT_H - scale(t) + 4} textAnchor="end" fontSize="10" fill="#64748b">{formatTick(t)}</text>
+        )
+      )}
+      <text x={left + plotW / 2} y={HEIGHT - 8} textAnchor="middle" fontSize="12" fill="#334155">{chart.x_label}</text>
+      {!horizontal && (
+        <text transform={`translate(14 ${MARGIN.top + PLOT_H / 2}) rotate(-90)`} textAnchor="middle" fontSize="12" fill="#334155">{chart.y_label}</text>
+      )}
+    </svg>
+  );
+}
+
+export default function VectorChart({ chart }: { chart: ChartPayload }) {
+  return (
+    <div className="mt-3 w-full max-w-[600px] rounded-xl border border-slate-200 bg-white p-3">
+      <p className="text-sm font-semibold text-slate-800 mb-2">{chart.title}</p>
+      {chart.type === 'histogram' ? <Histogram chart={chart} /> : <Bars chart={chart} />}
+      <Legend names={chart.series.map((ser) => ser.name)} />
+    </div>
+  );
+}
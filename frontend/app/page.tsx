@@ -2,10 +2,12 @@
 
 import { useState, FormEvent, useRef, useEffect } from 'react';
 import { Send, Bot, User, AlertCircle, Loader2 } from 'lucide-react';
+import VectorChart, { ChartPayload } from './components/VectorChart';
 
 interface ChatMessage {
   role: 'user' | 'model' | 'error';
   content: string;
+  charts?: ChartPayload[];
 }
 
 export default function Home() {
@@ -36,7 +38,9 @@ export default function Home() {
         },
         body: JSON.stringify({
           message: input,
-          history: messages.filter(msg => msg.role === 'user' || msg.role === 'model')
+          history: messages
+            .filter(msg => msg.role === 'user' || msg.role === 'model')
+            .map(({ role, content }) => ({ role, content }))
         }),
       });
 
@@ -46,7 +50,9 @@ export default function Home() {
 
       const data = await response.json();
       
-      const modelMessage: ChatMessage = { role: 'model', content: data.reply };
+      const modelMessage: ChatMessage = data.error
+        ? { role: 'error', content: data.reply }
+        : { role: 'model', content: data.reply, charts: data.charts ?? [] };
       setMessages((prev) => [...prev, modelMessage]);
 
     } catch (error) {
@@ -125,6 +131,9 @@ export default function Home() {
                   ) : (
                     <p className="text-sm leading-relaxed whitespace-pre-wrap">{msg.content}</p>
                   )}
+                  {msg.charts?.map((chart, chartIndex) => (
+                    <VectorChart key={chartIndex} chart={chart} />
+                  ))}
                 </div>
                 {msg.role === 'model' && (
                   <p className="text-xs text-slate-400 mt-1.5 ml-1">Assistente IA</p>
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
+import sys
 import pandas as pd
 import numpy as np
 import joblib
@@ -18,9 +19,15 @@ from xgboost import XGBClassifier, XGBRegressor
 from lightgbm import LGBMClassifier, LGBMRegressor
 import json 
 
+# Reaproveita o mesmo código de janelas deslizantes usado pelo backend (paridade treino/serviço)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from app.utils.rolling_state import compute_rolling_features, ROLLING_FEATURES
+from app.utils.drift_stats import build_drift_reference
+
 # Configurações
 warnings.filterwarnings("ignore")
 RANDOM_SEED = 42
+ROLLING_WINDOW = 10  # Leituras por máquina usadas nas features de tendência
 
 # ===================================================================
 # 2. CARREGAMENTO E PREPARAÇÃO DOS DADOS
@@ -34,6 +41,21 @@ def load_data(filepath):
         return None, None, None, None, None
 
     df = pd.read_csv(filepath)
+
+    # Features de tendência por máquina ('Product ID'), na ordem temporal das leituras (UDI)
+    if 'UDI' in df.columns:
+        df = df.sort_values('UDI').reset_index(drop=True)
+    if 'Product ID' not in df.columns:
+        df['Product ID'] = df.index.astype(str)
+    rolling_df = compute_rolling_features(df, id_column='Product ID', window=ROLLING_WINDOW)
+    # Sem IDs repetidos (caso do AI4I) as tendências são cópias da leitura atual ou zeros:
+    # os modelos só as usam quando há histórico real por máquina
+    use_rolling = bool(df['Product ID'].duplicated().any())
+    rolling_model_features = ROLLING_FEATURES if use_rolling else []
+    print(f"Features de janela deslizante calculadas (janela={ROLLING_WINDOW}, "
+          f"{'usadas' if use_rolling else 'NÃO usadas'} nos modelos: "
+          f"{'há' if use_rolling else 'sem'} leituras repetidas por 'Product ID').")
+
     df = df.drop(columns=['UDI', 'Product ID'], errors='ignore')
 
     # Salva uma cópia limpa para o backend usar
@@ -42,7 +64,7 @@ def load_data(filepath):
     df.to_csv('data/predictive_maintenance_cleaned.csv', index=False)
     print("DataFrame limpo salvo em 'data/predictive_maintenance_cleaned.csv'")
 
-    df_ml = df.copy()
+    df_ml = pd.concat([df, rolling_df], axis=1)
     le = LabelEncoder()
     df_ml['Type'] = le.fit_transform(df_ml['Type'])
     
@@ -51,17 +73,22 @@ def load_data(filepath):
     joblib.dump(le, 'models/type_label_encoder.pkl')
     print("LabelEncoder 'Type' salvo em 'models/type_label_encoder.pkl'")
 
+    # Referência compacta da distribuição de treino para o monitoramento de drift
+    with open('models/drift_reference.json', 'w', encoding='utf-8') as f:
+        json.dump(build_drift_reference(df), f)
+    print("Referência de drift salva em 'models/drift_reference.json'")
+
 
     features_classification = [
         'Type', 'Air temperature [K]', 'Process temperature [K]',
         'Rotational speed [rpm]', 'Torque [Nm]', 'Tool wear [min]'
-    ]
+    ] + rolling_model_features
     target_classification = 'Target'
 
     features_regression = [
         'Type', 'Air temperature [K]', 'Process temperature [K]',
         'Rotational speed [rpm]', 'Torque [Nm]'
-    ]
+    ] + rolling_model_features
     target_regression = 'Tool wear [min]'
 
     X_class = df_ml[features_classification]
@@ -276,6 +303,8 @@ EXEMPLOS DE CONVERSÃO:
             'regression_features_cleaned': list(reg_features_cleaned),
             'original_columns': list(original_cols),
             'column_aliases': column_aliases,
+            'rolling_window': ROLLING_WINDOW,
+            'rolling_features': ROLLING_FEATURES,
             'columns_prompt': columns_prompt  # NOVO: prompt completo sobre colunas
         }
         